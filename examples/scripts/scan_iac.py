@@ -12,19 +12,21 @@ from pathlib import Path
 # Ensure we can import from the iac_scanner package
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
+from iac_scanner.core.fswalk import path_exists
 from iac_scanner.plugins import discover_plugins, get_plugin
 from iac_scanner.core.llm import LLMClient
 
 
-async def scan_iac_directory(path, tools=None, use_llm=True):
+async def scan_iac_directory(path, tools=None, use_llm=True, max_concurrent=3, plugin_timeout=None):
     """Scan an IAC directory using the specified tools."""
     
-    # Convert path to Path object
-    scan_path = Path(path)
-    if not scan_path.exists():
+    if not path_exists(path):
         print(f"Error: Path not found: {path}")
         return None
     
+    # Convert path to Path object
+    scan_path = Path(path)
+    
     # Discover available plugins
     discover_plugins()
     
@@ -37,33 +39,50 @@ async def scan_iac_directory(path, tools=None, use_llm=True):
     
     print(f"Running scan on {path} with tools: {', '.join(tool_names)}")
     
-    # Run the scan with each tool
+    # Run the scan with each tool concurrently
     results = {}
     errors = {}
+    semaphore = asyncio.Semaphore(max_concurrent)
     
-    for tool_name in tool_names:
+    async def _run_one(tool_name):
         plugin_class = get_plugin(tool_name)
         if not plugin_class:
-            errors[tool_name] = f"Plugin not found: {tool_name}"
+            return tool_name, None, f"Plugin not found: {tool_name}"
+        
+        async with semaphore:
+            try:
+                print(f"Running scan with {tool_name}...")
+                plugin = plugin_class()
+                try:
+                    if not await plugin.validate_config():
+                        return tool_name, None, "Invalid plugin configuration"
+                    
+                    scan_result = await asyncio.wait_for(plugin.scan(scan_path), timeout=plugin_timeout)
+                    return tool_name, scan_result, None
+                finally:
+                    await plugin.close()
+            except asyncio.TimeoutError:
+                return tool_name, None, f"Scan timed out after {plugin_timeout} seconds"
+            except Exception as e:
+                return tool_name, None, str(e)
+    
+    outcomes = await asyncio.gather(*[_run_one(t) for t in tool_names], return_exceptions=True)
+    for tool_name, outcome in zip(tool_names, outcomes):
+        if isinstance(outcome, BaseException):
+            errors[tool_name] = str(outcome)
             continue
         
-        try:
-            print(f"Running scan with {tool_name}...")
-            plugin = plugin_class()
-            if not await plugin.validate_config():
-                errors[tool_name] = "Invalid plugin configuration"
-                continue
-            
-            scan_result = await plugin.scan(scan_path)
+        _, scan_result, error = outcome
+        if error is not None:
+            errors[tool_name] = error
+        else:
             results[tool_name] = scan_result
-        except Exception as e:
-            errors[tool_name] = str(e)
     
     # Process results with LLM if requested
     if use_llm:
         llm_config = {
             "aws_region": os.environ.get("AWS_REGION", "us-east-1"),
-            "model_id": os.environ.get("BEDROCK_MODEL_ID", "anthropic.claude-v2"),
+            "model_id": os.environ.get("BEDROCK_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0"),
             "aws_profile": os.environ.get("AWS_PROFILE"),
             "aws_access_key": os.environ.get("AWS_ACCESS_KEY_ID"),
             "aws_secret_key": os.environ.get("AWS_SECRET_ACCESS_KEY"),
@@ -138,7 +157,7 @@ if __name__ == "__main__":
     if "AWS_REGION" not in os.environ:
         os.environ["AWS_REGION"] = "us-east-1"
     if "BEDROCK_MODEL_ID" not in os.environ:
-        os.environ["BEDROCK_MODEL_ID"] = "anthropic.claude-v2"
+        os.environ["BEDROCK_MODEL_ID"] = "anthropic.claude-3-sonnet-20240229-v1:0"
     
     # Run the async main function
     asyncio.run(main()) 
\ No newline at end of file
@@ -8,7 +8,7 @@ pip install -e .
 
 # Set up environment variables (can also be placed in .env file)
 export AWS_REGION=us-east-1
-export BEDROCK_MODEL_ID=anthropic.claude-v2
+export BEDROCK_MODEL_ID=anthropic.claude-3-sonnet-20240229-v1:0
 
 # Run the scan on the sample Terraform code with both Zodiac and Checkov
 echo "Scanning Terraform code with multiple tools..."
@@ -3,20 +3,89 @@
 import asyncio
 import json
 import os
+import shutil
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Type
 
 import click
-from dotenv import load_dotenv
 
 from iac_scanner import __version__
-from iac_scanner.core.server import Server, ServerConfig
-from iac_scanner.plugins import discover_plugins, get_plugin, get_all_plugins
+from iac_scanner.core.fswalk import path_exists
+from iac_scanner.plugins import (
+    discover_plugins,
+    get_all_plugins,
+    get_plugin,
+    get_plugin_capabilities,
+)
+from iac_scanner.plugins.base import BasePlugin
+
+CAPABILITIES_CACHE = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "iac_scanner"
+    / "capabilities.json"
+)
 
 
 # Load environment variables from .env file if present
-load_dotenv()
+if os.path.exists(".env"):
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+
+
+def _dump_json(data: Any) -> bytes:
+    """Serialize data as indented JSON, using orjson when it is installed."""
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(data, indent=2).encode()
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+
+def _dump_yaml(data: Any, stream=None):
+    """Serialize data as YAML, using the libyaml dumper when it is available."""
+    import yaml
+    
+    try:
+        from yaml import CSafeDumper as Dumper
+    except ImportError:
+        from yaml import SafeDumper as Dumper
+    return yaml.dump(data, stream, Dumper=Dumper)
+
+
+def _capabilities_fingerprint(plugin_class: Type[BasePlugin]) -> List[Any]:
+    """Identify the plugin and tool version that capabilities were probed from.
+    
+    Cached capabilities are reused only while the package version, the
+    plugin class and the mtime of the plugin's tool executable are unchanged.
+    """
+    tool_path = shutil.which(plugin_class.tool_command) if plugin_class.tool_command else None
+    tool_mtime = os.path.getmtime(tool_path) if tool_path else None
+    return [
+        __version__,
+        f"{plugin_class.__module__}.{plugin_class.__qualname__}",
+        tool_path,
+        tool_mtime,
+    ]
+
+
+def _load_capabilities_cache() -> Dict[str, Any]:
+    """Load cached plugin capabilities from disk."""
+    try:
+        with CAPABILITIES_CACHE.open() as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_capabilities_cache(cache: Dict[str, Any]):
+    """Save plugin capabilities to disk, ignoring write failures."""
+    try:
+        CAPABILITIES_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        with CAPABILITIES_CACHE.open("w") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
 
 
 @click.group()
@@ -36,15 +105,20 @@ def server():
 @click.option("--host", default="localhost", help="Host to bind the server to")
 @click.option("--port", default=8000, help="Port to bind the server to")
 @click.option("--log-level", default="INFO", help="Logging level")
-def start_server(host: str, port: int, log_level: str):
+@click.option("--workers", default=1, help="Number of worker processes")
+def start_server(host: str, port: int, log_level: str, workers: int):
     """Start the server."""
+    # FastAPI and pydantic are only needed here, so keep them off the CLI's import path
+    from iac_scanner.core.server import Server, ServerConfig
+    
     config = ServerConfig(
         host=host,
         port=port,
         log_level=log_level,
+        workers=workers,
         llm_config={
             "aws_region": os.environ.get("AWS_REGION", "us-east-1"),
-            "model_id": os.environ.get("BEDROCK_MODEL_ID", "anthropic.claude-v2"),
+            "model_id": os.environ.get("BEDROCK_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0"),
             "aws_profile": os.environ.get("AWS_PROFILE"),
             "aws_access_key": os.environ.get("AWS_ACCESS_KEY_ID"),
             "aws_secret_key": os.environ.get("AWS_SECRET_ACCESS_KEY"),
@@ -61,13 +135,22 @@ def start_server(host: str, port: int, log_level: str):
 @click.option("--tools", "-t", multiple=True, help="Tools to use for scanning")
 @click.option("--output", "-o", help="Output file for scan results")
 @click.option("--format", "-f", default="json", type=click.Choice(["json", "yaml"]), help="Output format")
-def scan(path: str, tools: List[str], output: Optional[str], format: str):
+@click.option("--max-concurrent", default=3, help="Maximum number of tools to run concurrently")
+@click.option("--timeout", type=float, default=None, help="Timeout in seconds for each tool")
+def scan(
+    path: str,
+    tools: List[str],
+    output: Optional[str],
+    format: str,
+    max_concurrent: int,
+    timeout: Optional[float],
+):
     """Scan IAC code."""
     async def run_scan():
-        scan_path = Path(path)
-        if not scan_path.exists():
+        if not path_exists(path):
             click.echo(f"Error: Path not found: {path}", err=True)
             sys.exit(1)
+        scan_path = Path(path)
         
         # Discover available plugins
         discover_plugins()
@@ -76,27 +159,44 @@ def scan(path: str, tools: List[str], output: Optional[str], format: str):
         tool_names = list(tools) if tools else list(get_all_plugins().keys())
         click.echo(f"Running scan on {path} with tools: {', '.join(tool_names)}")
         
-        # Run the scan with each tool
+        # Run the scan with each tool concurrently
         results = {}
         errors = {}
+        semaphore = asyncio.Semaphore(max_concurrent)
         
-        for tool_name in tool_names:
+        async def _run_one(tool_name: str):
             plugin_class = get_plugin(tool_name)
             if not plugin_class:
-                errors[tool_name] = f"Plugin not found: {tool_name}"
+                return tool_name, None, f"Plugin not found: {tool_name}"
+            
+            async with semaphore:
+                try:
+                    click.echo(f"Running scan with {tool_name}...")
+                    plugin = plugin_class()
+                    try:
+                        if not await plugin.validate_config():
+                            return tool_name, None, "Invalid plugin configuration"
+                        
+                        scan_result = await asyncio.wait_for(plugin.scan(scan_path), timeout=timeout)
+                        return tool_name, scan_result, None
+                    finally:
+                        await plugin.close()
+                except asyncio.TimeoutError:
+                    return tool_name, None, f"Scan timed out after {timeout} seconds"
+                except Exception as e:
+                    return tool_name, None, str(e)
+        
+        outcomes = await asyncio.gather(*[_run_one(t) for t in tool_names], return_exceptions=True)
+        for tool_name, outcome in zip(tool_names, outcomes):
+            if isinstance(outcome, BaseException):
+                errors[tool_name] = str(outcome)
                 continue
             
-            try:
-                click.echo(f"Running scan with {tool_name}...")
-                plugin = plugin_class()
-                if not await plugin.validate_config():
-                    errors[tool_name] = "Invalid plugin configuration"
-                    continue
-                
-                scan_result = await plugin.scan(scan_path)
+            _, scan_result, error = outcome
+            if error is not None:
+                errors[tool_name] = error
+            else:
                 results[tool_name] = scan_result
-            except Exception as e:
-                errors[tool_name] = str(e)
         
         # Prepare the output
         scan_output = {
@@ -109,19 +209,17 @@ def scan(path: str, tools: List[str], output: Optional[str], format: str):
         if output:
             output_path = Path(output)
             if format == "json":
-                with output_path.open("w") as f:
-                    json.dump(scan_output, f, indent=2)
+                with output_path.open("wb") as f:
+                    f.write(_dump_json(scan_output))
             elif format == "yaml":
-                import yaml
                 with output_path.open("w") as f:
-                    yaml.dump(scan_output, f)
+                    _dump_yaml(scan_output, f)
             click.echo(f"Scan results written to {output}")
         else:
             if format == "json":
-                click.echo(json.dumps(scan_output, indent=2))
+                click.echo(_dump_json(scan_output).decode())
             elif format == "yaml":
-                import yaml
-                click.echo(yaml.dump(scan_output))
+                click.echo(_dump_yaml(scan_output))
     
     # Run the async function
     asyncio.run(run_scan())
@@ -137,9 +235,27 @@ def list_plugins():
         plugins = get_all_plugins()
         click.echo(f"Found {len(plugins)} plugins:")
         
-        for name, plugin_class in plugins.items():
-            plugin = plugin_class()
-            capabilities = await plugin.get_capabilities()
+        # Probe capabilities concurrently, reusing those cached on disk
+        cache = _load_capabilities_cache()
+        semaphore = asyncio.Semaphore(4)
+        
+        async def _probe(name: str, plugin_class: Type[BasePlugin]):
+            fingerprint = _capabilities_fingerprint(plugin_class)
+            cached = cache.get(name)
+            if cached and cached.get("fingerprint") == fingerprint:
+                return name, cached["capabilities"]
+            
+            async with semaphore:
+                capabilities = await get_plugin_capabilities(plugin_class)
+            cache[name] = {"fingerprint": fingerprint, "capabilities": capabilities}
+            return name, capabilities
+        
+        cached_before = dict(cache)
+        probed = await asyncio.gather(*[_probe(n, c) for n, c in plugins.items()])
+        if cache != cached_before:
+            _save_capabilities_cache(cache)
+        
+        for name, capabilities in probed:
             click.echo(f"\n{name}:")
             click.echo(f"  Description: {capabilities.get('description', 'N/A')}")
             click.echo(f"  Supports: {', '.join(capabilities.get('supports', []))}")
@@ -0,0 +1,134 @@
+"""Concurrent filesystem traversal for collecting IAC files."""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+IAC_EXTENSIONS = (".tf", ".yaml", ".yml", ".json")
+
+# Directories that never contain IAC worth scanning
+SKIPPED_DIRECTORIES = frozenset({".git", ".terraform", ".serverless", "node_modules"})
+
+# Bytes forms of the skipped directory names, for comparison with raw entries
+_SKIPPED_DIRECTORIES_BYTES = frozenset(os.fsencode(d) for d in SKIPPED_DIRECTORIES)
+
+
+def path_exists(path: Union[str, bytes, Path]) -> bool:
+    """Check whether a path exists with a single stat call.
+    
+    Args:
+        path: Path to check
+        
+    Returns:
+        True if the path exists, False otherwise
+    """
+    try:
+        os.stat(path)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def _scan_directory(directory: bytes, exts: Tuple[bytes, ...]) -> Tuple[List[bytes], List[bytes]]:
+    """List the matching files and subdirectories of a single directory.
+    
+    Paths are handled as bytes so entry names are never decoded unless
+    they match.
+    
+    Args:
+        directory: Directory to list
+        exts: File extensions to match
+        
+    Returns:
+        A (files, subdirectories) tuple of paths
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _SKIPPED_DIRECTORIES_BYTES:
+                        subdirs.append(entry.path)
+                elif entry.is_file() and entry.name.endswith(exts):
+                    files.append(entry.path)
+    except OSError:
+        pass
+    
+    return files, subdirs
+
+
+async def collect_iac_files(
+    root: Union[str, Path],
+    exts: Tuple[str, ...] = IAC_EXTENSIONS,
+    max_workers: Optional[int] = None,
+) -> List[Path]:
+    """Collect the IAC files under a path.
+    
+    Directories are listed concurrently in a thread pool, one os.scandir
+    call per directory, so each file is only stat'ed once.
+    
+    Args:
+        root: Directory or file to collect from
+        exts: File extensions to match
+        max_workers: Maximum number of directory listing threads
+        
+    Returns:
+        Sorted list of matching files
+    """
+    root = Path(root)
+    if not os.path.isdir(root):
+        return [root] if root.name.endswith(exts) else []
+    
+    loop = asyncio.get_running_loop()
+    byte_exts = tuple(os.fsencode(ext) for ext in exts)
+    files: List[bytes] = []
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {loop.run_in_executor(pool, _scan_directory, os.fsencode(root), byte_exts)}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                found, subdirs = future.result()
+                files.extend(found)
+                pending.update(
+                    loop.run_in_executor(pool, _scan_directory, subdir, byte_exts)
+                    for subdir in subdirs
+                )
+    
+    return sorted(Path(os.fsdecode(f)) for f in files)
+
+
+def _contains_file(root: bytes, exts: Tuple[bytes, ...]) -> bool:
+    """Walk a tree one directory at a time until a matching file turns up."""
+    pending = [root]
+    while pending:
+        files, subdirs = _scan_directory(pending.pop(), exts)
+        if files:
+            return True
+        pending.extend(subdirs)
+    return False
+
+
+async def has_iac_files(root: Union[str, Path], exts: Tuple[str, ...] = IAC_EXTENSIONS) -> bool:
+    """Check whether there is any IAC file under a path.
+    
+    Unlike collect_iac_files, the walk stops at the first directory holding
+    a matching file, so answering this does not cost a full traversal.
+    
+    Args:
+        root: Directory or file to check
+        exts: File extensions to match
+        
+    Returns:
+        True if a matching file was found, False otherwise
+    """
+    root = Path(root)
+    if not os.path.isdir(root):
+        return root.name.endswith(exts)
+    
+    byte_exts = tuple(os.fsencode(ext) for ext in exts)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _contains_file, os.fsencode(root), byte_exts)
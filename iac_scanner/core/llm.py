@@ -1,11 +1,211 @@
 """LLM client for enhancing IAC scanning with AWS Bedrock models."""
 
+import asyncio
+import functools
+import hashlib
 import json
 import logging
-from typing import Any, Dict, List, Optional
+import weakref
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 
-import boto3
-from botocore.exceptions import ClientError
+from cachetools import TTLCache
+
+from iac_scanner.core.semantic_cache import LocalIndex, normalize_findings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(data: Any, default=None) -> bytes:
+    """Serialize data as compact JSON with sorted keys.
+    
+    Uses orjson when it is installed and the stdlib json module otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            data, default=default, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(data, default=default, sort_keys=True, separators=(",", ":")).encode()
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can
+# catch the stdlib exception with either parser.
+_loads = orjson.loads if orjson is not None else json.loads
+
+DEFAULT_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+DEFAULT_EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v1"
+
+# Static instructions for Claude, sent as a cached system prompt. Keep this
+# byte-identical across requests so Bedrock can reuse the cached prefix.
+ANTHROPIC_SYSTEM_PROMPT = (
+    "You are an expert in cloud Infrastructure as Code (IaC) and security. "
+    "Your task is to analyze scan results from different IaC scanning tools "
+    "and provide insights, recommendations, and a prioritized list of issues."
+)
+
+# Curated remediation guidance sent as a second cached system block. Bump
+# KB_VERSION whenever the document changes; it is part of the response
+# cache key, so cached analyses made with the old guidance are not reused.
+KB_VERSION = "2024-10-01"
+KB_PATH = Path(__file__).parent / "kb" / "iac_best_practices.md"
+
+
+@functools.lru_cache(maxsize=None)
+def _load_knowledge_base() -> str:
+    """Read the best-practices knowledge base, or "" if it is missing."""
+    try:
+        return KB_PATH.read_text(encoding="utf-8")
+    except OSError as e:
+        logging.getLogger("iac_scanner.llm").warning(
+            "Knowledge base not available at %s: %s", KB_PATH, e
+        )
+        return ""
+
+
+def _anthropic_system_blocks() -> List[Dict[str, Any]]:
+    """Build the cached system blocks for Anthropic Claude models.
+    
+    Returns:
+        The static instructions followed by the knowledge base, each marked
+        as a cache breakpoint
+    """
+    blocks = [
+        {
+            "type": "text",
+            "text": ANTHROPIC_SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+    knowledge_base = _load_knowledge_base()
+    if knowledge_base:
+        blocks.append({
+            "type": "text",
+            "text": f"IaC best-practices reference (version {KB_VERSION}):\n\n{knowledge_base}",
+            "cache_control": {"type": "ephemeral"},
+        })
+    return blocks
+
+# Finding lists that are compacted before being sent to the model. Passed
+# checks are dropped entirely; their counts remain in each tool's summary.
+_COMPACTED_FINDING_KEYS = ("failed_checks", "skipped_checks")
+_DROPPED_KEYS = ("passed_checks",)
+
+
+def _compact_finding(check: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a finding to the fields the model needs.
+    
+    Args:
+        check: A finding from a Checkov API or CLI result
+        
+    Returns:
+        The finding with only id, name, severity, resource, file and line set
+    """
+    finding = {
+        "id": check.get("check_id") or check.get("id"),
+        "name": check.get("check_name") or check.get("name"),
+        "severity": check.get("severity"),
+        "resource": check.get("resource"),
+        "file": check.get("file_path") or check.get("file"),
+        "line": check.get("file_line_range") or check.get("line"),
+    }
+    return {k: v for k, v in finding.items() if v is not None}
+
+
+def _finding_key(finding: Dict[str, Any]) -> Tuple:
+    """Return a hashable key identifying a compacted finding."""
+    return tuple(
+        tuple(v) if isinstance(v, list) else v
+        for v in (finding.get(k) for k in ("id", "severity", "resource", "file", "line"))
+    )
+
+
+def _compact_node(node: Any, seen: Set[Tuple]) -> Any:
+    """Recursively drop empty values and compact finding lists."""
+    if isinstance(node, dict):
+        compacted = {}
+        for key, value in node.items():
+            if key in _DROPPED_KEYS:
+                continue
+            if key in _COMPACTED_FINDING_KEYS and isinstance(value, list):
+                findings = []
+                for check in value:
+                    if not isinstance(check, dict):
+                        continue
+                    finding = _compact_finding(check)
+                    finding_key = _finding_key(finding)
+                    if finding_key in seen:
+                        continue
+                    seen.add(finding_key)
+                    findings.append(finding)
+                value = findings
+            else:
+                value = _compact_node(value, seen)
+            if value is None or value == {} or value == [] or value == "":
+                continue
+            compacted[key] = value
+        return compacted
+    if isinstance(node, list):
+        return [
+            v for v in (_compact_node(item, seen) for item in node)
+            if v is not None and v != {} and v != [] and v != ""
+        ]
+    return node
+
+
+def _compact_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact scan results before embedding them in a prompt.
+    
+    Findings are reduced to their essential fields and identical findings
+    reported more than once (including by different tools) are kept once.
+    Empty and null values are dropped.
+    
+    Args:
+        results: Scan results keyed by tool name
+        
+    Returns:
+        A compacted copy of the results
+    """
+    return _compact_node(results, set())
+
+
+def _extract_json(text: str) -> Dict[str, Any]:
+    """Parse the JSON object in a model response.
+    
+    The whole response is tried first. Otherwise the first JSON object
+    embedded in surrounding text (such as a fenced code block) is decoded
+    in a single forward scan.
+    
+    Args:
+        text: Model output
+        
+    Returns:
+        The parsed JSON object
+        
+    Raises:
+        ValueError: If the response contains no JSON object
+    """
+    try:
+        parsed = _loads(text)
+        if isinstance(parsed, dict):
+            return parsed
+    except json.JSONDecodeError:
+        pass
+    
+    decoder = json.JSONDecoder()
+    idx = text.find("{")
+    while idx != -1:
+        try:
+            parsed, _ = decoder.raw_decode(text, idx)
+            if isinstance(parsed, dict):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+        idx = text.find("{", idx + 1)
+    
+    raise ValueError("No JSON found in response")
 
 
 class LLMClient:
@@ -17,23 +217,41 @@ class LLMClient:
         Args:
             config: Configuration dictionary. Supported keys:
                 - aws_region: AWS region for Bedrock (default: "us-east-1")
-                - model_id: Bedrock model ID (default: "anthropic.claude-v2")
+                - model_id: Bedrock model ID (default: DEFAULT_MODEL_ID)
                 - temperature: Temperature for generation (default: 0.2)
                 - max_tokens: Maximum tokens for generation (default: 4000)
                 - aws_profile: AWS profile name (optional)
                 - aws_access_key: AWS access key (optional)
                 - aws_secret_key: AWS secret key (optional)
+                - cache_ttl: Seconds to cache processed results (default: 1800)
+                - semantic_cache_threshold: Minimum cosine similarity for a
+                  semantic cache hit, e.g. 0.92. Each cache miss then costs an
+                  extra embedding call (default: None, disabled)
+                - semantic_cache_path: File to persist the semantic cache to (optional)
+                - embedding_model_id: Bedrock embedding model ID
+                  (default: DEFAULT_EMBEDDING_MODEL_ID)
         """
         self.config = config or {}
         self.logger = logging.getLogger("iac_scanner.llm")
         self._bedrock_client = None
         
+        # Cache of processed results keyed on a hash of the request
+        self._resp_cache = TTLCache(maxsize=512, ttl=self.config.get("cache_ttl", 1800))
+        self._cache_locks = weakref.WeakValueDictionary()
+        
+        # Semantic cache of processed results keyed on normalized findings
+        self._semantic_index = None
+        if self.config.get("semantic_cache_threshold") is not None:
+            self._semantic_index = LocalIndex(self.config.get("semantic_cache_path"))
+        
         # Initialize the AWS Bedrock client
         self._initialize_bedrock_client()
     
     def _initialize_bedrock_client(self):
         """Initialize the AWS Bedrock client."""
         try:
+            import boto3
+            
             session_kwargs = {}
             
             # Check if profile or access keys are provided
@@ -54,7 +272,7 @@ class LLMClient:
             
             self.logger.info("AWS Bedrock client initialized successfully")
         except Exception as e:
-            self.logger.error(f"Error initializing AWS Bedrock client: {e}")
+            self.logger.error("Error initializing AWS Bedrock client: %s", e)
             self._bedrock_client = None
     
     def is_available(self) -> bool:
@@ -65,9 +283,33 @@ class LLMClient:
         """
         return self._bedrock_client is not None
     
+    def _cache_key(self, results: Dict[str, Any]) -> str:
+        """Compute a deterministic cache key for a set of scan results.
+        
+        Args:
+            results: Scan results to process
+            
+        Returns:
+            SHA-256 hex digest of the model settings, knowledge base version
+            and results
+        """
+        payload = {
+            "m": self.config.get("model_id", DEFAULT_MODEL_ID),
+            "t": self.config.get("temperature", 0.2),
+            "mt": self.config.get("max_tokens", 4000),
+            "kb": KB_VERSION,
+            "r": results,
+        }
+        return hashlib.sha256(
+            _dumps(payload, default=str)
+        ).hexdigest()
+    
     async def process_scan_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
         """Process scan results with the LLM.
         
+        Identical results are served from an in-process cache, and concurrent
+        requests for the same results share a single model invocation.
+        
         Args:
             results: Scan results to process
             
@@ -77,49 +319,237 @@ class LLMClient:
         if not self.is_available():
             return results
         
+        key = self._cache_key(results)
+        cached = self._resp_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        lock = self._cache_locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._cache_locks[key] = lock
+        
+        async with lock:
+            cached = self._resp_cache.get(key)
+            if cached is not None:
+                return cached
+            
+            embedding = await self._embed_findings(results)
+            if embedding is not None:
+                cached = self._semantic_index.lookup(
+                    embedding, self.config["semantic_cache_threshold"], self._semantic_scope()
+                )
+                if cached is not None:
+                    processed_results = {**cached, "raw_results": results}
+                    self._resp_cache[key] = processed_results
+                    return processed_results
+            
+            processed_results = await self._invoke_model(results)
+            if "error" not in processed_results:
+                self._resp_cache[key] = processed_results
+                if embedding is not None:
+                    insights = {k: v for k, v in processed_results.items() if k != "raw_results"}
+                    self._semantic_index.add(embedding, insights, self._semantic_scope())
+            return processed_results
+    
+    def _semantic_scope(self) -> str:
+        """Describe the settings a semantic cache entry is valid for.
+        
+        Returns:
+            The model settings and knowledge base version, serialized
+        """
+        return _dumps({
+            "m": self.config.get("model_id", DEFAULT_MODEL_ID),
+            "t": self.config.get("temperature", 0.2),
+            "mt": self.config.get("max_tokens", 4000),
+            "e": self.config.get("embedding_model_id", DEFAULT_EMBEDDING_MODEL_ID),
+            "kb": KB_VERSION,
+        }).decode()
+    
+    async def _embed_findings(self, results: Dict[str, Any]) -> Optional[List[float]]:
+        """Embed the normalized findings of scan results for semantic lookup.
+        
+        Args:
+            results: Scan results to embed
+            
+        Returns:
+            The embedding vector, or None if the semantic cache is disabled,
+            no findings were extracted or the embedding call failed
+        """
+        if self._semantic_index is None:
+            return None
+        
+        text = normalize_findings(results)
+        if not text:
+            return None
+        
         try:
-            # Get the model ID from config
-            model_id = self.config.get("model_id", "anthropic.claude-v2")
+            body = await self._run_blocking(
+                self._invoke_model_sync,
+                self.config.get("embedding_model_id", DEFAULT_EMBEDDING_MODEL_ID),
+                {"inputText": text}
+            )
+            return body.get("embedding")
+        except Exception as e:
+            self.logger.error("Error embedding scan findings: %s", e)
+            return None
+    
+    async def stream_scan_results(self, results: Dict[str, Any]) -> AsyncIterator[str]:
+        """Stream the LLM analysis of scan results as it is generated.
+        
+        Args:
+            results: Scan results to process
             
-            # Format the prompt based on the model
-            if "anthropic" in model_id:
-                prompt = self._create_anthropic_prompt(results)
-                request_body = {
-                    "prompt": prompt,
-                    "max_tokens_to_sample": self.config.get("max_tokens", 4000),
-                    "temperature": self.config.get("temperature", 0.2),
-                    "top_p": 0.9,
-                }
-            elif "amazon" in model_id:
-                prompt = self._create_amazon_prompt(results)
-                request_body = {
-                    "inputText": prompt,
-                    "textGenerationConfig": {
-                        "maxTokenCount": self.config.get("max_tokens", 4000),
-                        "temperature": self.config.get("temperature", 0.2),
-                        "topP": 0.9,
-                    }
-                }
+        Yields:
+            Text deltas of the model output
+        """
+        if not self.is_available():
+            return
+        
+        model_id = self.config.get("model_id", DEFAULT_MODEL_ID)
+        request_body = self._create_request_body(model_id, results)
+        
+        response = await self._run_blocking(
+            self._bedrock_client.invoke_model_with_response_stream,
+            modelId=model_id,
+            body=_dumps(request_body)
+        )
+        
+        # Pull each event off the stream in a worker thread
+        events = iter(response.get("body"))
+        while True:
+            event = await self._run_blocking(next, events, None)
+            if event is None:
+                break
+            
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            
+            data = _loads(chunk.get("bytes"))
+            if data.get("type") == "content_block_delta":
+                text = data.get("delta", {}).get("text", "")
+            elif "outputText" in data:
+                text = data.get("outputText", "")
             else:
-                # Default to a generic prompt format
-                prompt = self._create_generic_prompt(results)
-                request_body = {
-                    "prompt": prompt,
-                    "max_tokens": self.config.get("max_tokens", 4000),
+                text = data.get("generated_text", "")
+            
+            if text:
+                yield text
+    
+    def _create_request_body(self, model_id: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the Bedrock request body for a model.
+        
+        Args:
+            model_id: Bedrock model ID
+            results: Scan results to analyze
+            
+        Returns:
+            Request body in the format expected by the model
+        """
+        # Format the prompt based on the model
+        if "anthropic" in model_id:
+            prompt = self._create_anthropic_prompt(results)
+            request_body = {
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": self.config.get("max_tokens", 4000),
+                "temperature": self.config.get("temperature", 0.2),
+                "top_p": 0.9,
+                "system": _anthropic_system_blocks(),
+                "messages": [
+                    {"role": "user", "content": [{"type": "text", "text": prompt}]}
+                ],
+            }
+        elif "amazon" in model_id:
+            prompt = self._create_amazon_prompt(results)
+            request_body = {
+                "inputText": prompt,
+                "textGenerationConfig": {
+                    "maxTokenCount": self.config.get("max_tokens", 4000),
                     "temperature": self.config.get("temperature", 0.2),
+                    "topP": 0.9,
                 }
+            }
+        else:
+            # Default to a generic prompt format
+            prompt = self._create_generic_prompt(results)
+            request_body = {
+                "prompt": prompt,
+                "max_tokens": self.config.get("max_tokens", 4000),
+                "temperature": self.config.get("temperature", 0.2),
+            }
+        
+        return request_body
+    
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking boto3 call in the default executor.
+        
+        Keeps the event loop free to serve other requests while Bedrock
+        generates a response.
+        
+        Args:
+            func: Blocking callable to run
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+            
+        Returns:
+            The return value of the callable
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+    
+    def _invoke_model_sync(self, model_id: str, request_body: Dict[str, Any]) -> Dict[str, Any]:
+        """Invoke a Bedrock model and decode its JSON response body.
+        
+        This blocks on the network; call it through _run_blocking.
+        
+        Args:
+            model_id: Bedrock model ID
+            request_body: Request body for the model
+            
+        Returns:
+            The decoded response body
+        """
+        response = self._bedrock_client.invoke_model(
+            modelId=model_id,
+            body=_dumps(request_body)
+        )
+        return _loads(response.get("body").read())
+    
+    async def _invoke_model(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Invoke the Bedrock model on scan results.
+        
+        Args:
+            results: Scan results to process
+            
+        Returns:
+            Processed scan results with additional insights
+        """
+        from botocore.exceptions import ClientError
+        
+        try:
+            # Get the model ID from config
+            model_id = self.config.get("model_id", DEFAULT_MODEL_ID)
+            
+            request_body = self._create_request_body(model_id, results)
             
             # Invoke the model
-            response = self._bedrock_client.invoke_model(
-                modelId=model_id,
-                body=json.dumps(request_body)
-            )
+            body = await self._run_blocking(self._invoke_model_sync, model_id, request_body)
             
             # Parse the response based on the model
-            body = json.loads(response.get("body").read())
             
             if "anthropic" in model_id:
-                llm_result = body.get("completion", "")
+                llm_result = "".join(
+                    block.get("text", "")
+                    for block in body.get("content", [])
+                    if block.get("type") == "text"
+                )
+                usage = body.get("usage", {})
+                self.logger.debug(
+                    "Prompt cache usage: %s tokens read, %s tokens written",
+                    usage.get("cache_read_input_tokens", 0),
+                    usage.get("cache_creation_input_tokens", 0),
+                )
             elif "amazon" in model_id:
                 llm_result = body.get("results", [{}])[0].get("outputText", "")
             else:
@@ -127,62 +557,49 @@ class LLMClient:
             
             # Parse the JSON response
             try:
-                processed_results = json.loads(llm_result)
-            except json.JSONDecodeError:
-                # If not valid JSON, attempt to extract JSON from the text
-                try:
-                    # Look for JSON between curly braces
-                    start_idx = llm_result.find('{')
-                    end_idx = llm_result.rfind('}') + 1
-                    if start_idx >= 0 and end_idx > start_idx:
-                        json_str = llm_result[start_idx:end_idx]
-                        processed_results = json.loads(json_str)
-                    else:
-                        raise ValueError("No JSON found in response")
-                except (ValueError, json.JSONDecodeError):
-                    # If still not valid, return a formatted error
-                    self.logger.error("Failed to parse LLM response as JSON")
-                    return {
-                        "raw_results": results,
-                        "error": "Failed to parse LLM response as JSON",
-                        "llm_response": llm_result
-                    }
+                processed_results = _extract_json(llm_result)
+            except ValueError:
+                # If still not valid, return a formatted error
+                self.logger.error("Failed to parse LLM response as JSON")
+                return {
+                    "raw_results": results,
+                    "error": "Failed to parse LLM response as JSON",
+                    "llm_response": llm_result
+                }
             
             # Add the original results
             processed_results["raw_results"] = results
             
             return processed_results
         except ClientError as e:
-            self.logger.error(f"AWS Bedrock error: {e}")
+            self.logger.error("AWS Bedrock error: %s", e)
             return {
                 "raw_results": results,
                 "error": f"AWS Bedrock error: {str(e)}"
             }
         except Exception as e:
-            self.logger.error(f"Error processing scan results with LLM: {e}")
+            self.logger.error("Error processing scan results with LLM: %s", e)
             return {
                 "raw_results": results,
                 "error": str(e)
             }
     
     def _create_anthropic_prompt(self, results: Dict[str, Any]) -> str:
-        """Create a prompt for Anthropic Claude models.
+        """Create the user message for Anthropic Claude models.
+        
+        The static instructions and the knowledge base are sent separately as
+        cached system blocks (see _anthropic_system_blocks), so only the
+        per-scan content is built here.
         
         Args:
             results: Scan results to analyze
             
         Returns:
-            Formatted prompt for Claude
+            Formatted user message for Claude
         """
-        system_content = (
-            "You are an expert in cloud Infrastructure as Code (IaC) and security. "
-            "Your task is to analyze scan results from different IaC scanning tools "
-            "and provide insights, recommendations, and a prioritized list of issues."
-        )
-        
-        human_content = (
+        return (
             f"I have the following scan results from Infrastructure as Code scanning tools:\n\n"
-            f"{json.dumps(results, indent=2)}\n\n"
+            f"{_dumps(_compact_results(results), default=str).decode()}\n\n"
             f"Please analyze these results and provide:\n"
             f"1. A summary of the findings\n"
             f"2. Prioritized issues from most critical to least critical\n"
@@ -191,8 +608,6 @@ class LLMClient:
             f"Format your response as JSON with the keys: 'summary', 'prioritized_issues', "
             f"'recommendations', and 'additional_concerns'."
         )
-        
-        return f"\n\nHuman: {system_content}\n\n{human_content}\n\nAssistant:"
     
     def _create_amazon_prompt(self, results: Dict[str, Any]) -> str:
         """Create a prompt for Amazon Titan models.
@@ -206,7 +621,7 @@ class LLMClient:
         return (
             f"You are an expert in cloud Infrastructure as Code (IaC) and security. "
             f"Analyze the following scan results from IaC scanning tools:\n\n"
-            f"{json.dumps(results, indent=2)}\n\n"
+            f"{_dumps(_compact_results(results), default=str).decode()}\n\n"
             f"Provide: 1) Summary of findings 2) Prioritized issues from most to least critical "
             f"3) Recommendations to fix issues 4) Additional security concerns.\n\n"
             f"Format response as JSON with keys: 'summary', 'prioritized_issues', "
@@ -224,7 +639,7 @@ class LLMClient:
         """
         return (
             f"Analyze these Infrastructure as Code scan results as a security expert:\n\n"
-            f"{json.dumps(results, indent=2)}\n\n"
+            f"{_dumps(_compact_results(results), default=str).decode()}\n\n"
             f"Return a JSON with keys: 'summary', 'prioritized_issues', 'recommendations', "
             f"and 'additional_concerns'."
         ) 
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""Semantic cache for LLM analyses of IAC scan results."""
+
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+# Keys under which plugins report findings
+FINDING_KEYS = ("failed_checks", "findings")
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def _collect_findings(
+    tool: str, node: Any, findings: List[Tuple[str, str, str, str, str]]
+) -> None:
+    """Recursively collect findings from a tool's scan result.
+    
+    Only entries of finding lists (see FINDING_KEYS) count, so passed and
+    skipped checks never make a fixed issue look like an open one. Entries
+    need a check identifier and a resource, which covers both the Checkov
+    API and CLI result shapes.
+    """
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in FINDING_KEYS and isinstance(value, list):
+                for finding in value:
+                    if not isinstance(finding, dict):
+                        continue
+                    check_id = finding.get("check_id") or finding.get("id")
+                    resource = finding.get("resource")
+                    if check_id and resource:
+                        findings.append((
+                            tool, key, str(check_id), str(resource), str(finding.get("severity") or "")
+                        ))
+            else:
+                _collect_findings(tool, value, findings)
+    elif isinstance(node, list):
+        for value in node:
+            _collect_findings(tool, value, findings)
+
+
+def normalize_findings(results: Dict[str, Any]) -> str:
+    """Normalize scan results into a stable text form for embedding.
+    
+    Args:
+        results: Scan results keyed by tool name
+        
+    Returns:
+        One sorted "tool list check_id resource severity" line per finding,
+        or an empty string if no findings could be extracted
+    """
+    findings: List[Tuple[str, str, str, str, str]] = []
+    for tool, result in results.items():
+        _collect_findings(tool, result, findings)
+    
+    return "\n".join(" ".join(finding) for finding in sorted(set(findings)))
+
+
+class LocalIndex:
+    """In-memory cosine-similarity index of prior LLM responses.
+    
+    Each entry is tagged with a scope (e.g. the model settings and knowledge
+    base version it was produced with) and only matches lookups in the same
+    scope, so persisted entries stop matching once those settings change.
+    """
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None, max_entries: int = 1024):
+        """Initialize the index.
+        
+        Args:
+            path: Optional .npz file to load the index from and persist it to
+            max_entries: Maximum number of responses to keep
+        """
+        # numpy is only needed once the semantic cache is enabled
+        import numpy
+        
+        self._np = numpy
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.embeddings: Optional["np.ndarray"] = None
+        self.responses: List[Dict[str, Any]] = []
+        self.scopes: List[str] = []
+        self.logger = logging.getLogger("iac_scanner.semantic_cache")
+        
+        # Background save started by add; _dirty asks it to save once more
+        self._save_task: Optional[asyncio.Task] = None
+        self._dirty = False
+        
+        if self.path and self.path.exists():
+            self.load()
+    
+    def _normalize(self, vector: List[float]) -> "np.ndarray":
+        """L2-normalize an embedding vector."""
+        q = self._np.asarray(vector, dtype=self._np.float32)
+        norm = self._np.linalg.norm(q)
+        return q / norm if norm else q
+    
+    def lookup(self, vector: List[float], threshold: float, scope: str = "") -> Optional[Dict[str, Any]]:
+        """Find the closest stored response to an embedding.
+        
+        Args:
+            vector: Embedding of the normalized findings
+            threshold: Minimum cosine similarity for a hit
+            scope: Only entries added with this scope can match
+            
+        Returns:
+            The stored response on a hit, None otherwise
+        """
+        if self.embeddings is None or not self.responses:
+            return None
+        
+        q = self._normalize(vector)
+        if q.shape[0] != self.embeddings.shape[1]:
+            return None
+        
+        in_scope = self._np.array([s == scope for s in self.scopes])
+        if not in_scope.any():
+            return None
+        
+        sims = self._np.where(in_scope, self.embeddings @ q, -self._np.inf)
+        idx = int(sims.argmax())
+        if sims[idx] >= threshold:
+            return self.responses[idx]
+        return None
+    
+    def add(self, vector: List[float], response: Dict[str, Any], scope: str = "") -> None:
+        """Store a response and persist the index if a path is configured.
+        
+        Inside an event loop the index is written in a worker thread, and
+        adds made while a write is running are saved together afterwards.
+        
+        Args:
+            vector: Embedding of the normalized findings
+            response: Processed LLM response to store
+            scope: Scope the response was produced in (see lookup)
+        """
+        q = self._normalize(vector)[self._np.newaxis, :]
+        if self.embeddings is None or self.embeddings.shape[1] != q.shape[1]:
+            self.embeddings = q
+            self.responses = [response]
+            self.scopes = [scope]
+        else:
+            self.embeddings = self._np.vstack([self.embeddings, q])[-self.max_entries:]
+            self.responses = (self.responses + [response])[-self.max_entries:]
+            self.scopes = (self.scopes + [scope])[-self.max_entries:]
+        
+        if self.path:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.save()
+                return
+            self._dirty = True
+            if self._save_task is None or self._save_task.done():
+                self._save_task = loop.create_task(self._save_in_background())
+    
+    async def _save_in_background(self) -> None:
+        """Write the index in a worker thread until no add is left unsaved."""
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            self._dirty = False
+            # add replaces these rather than changing them in place, so the
+            # thread sees a consistent snapshot
+            await loop.run_in_executor(
+                None, self._write, self.embeddings, self.responses, self.scopes
+            )
+    
+    async def flush(self) -> None:
+        """Wait until responses added so far are saved."""
+        if self._save_task is not None:
+            await self._save_task
+    
+    def load(self) -> None:
+        """Load the index from disk.
+        
+        Indexes saved without scopes are discarded, since it is unknown
+        which model settings their responses were produced with.
+        """
+        try:
+            with self._np.load(self.path, allow_pickle=False) as data:
+                if "scopes" not in data:
+                    return
+                self.embeddings = data["embeddings"]
+                self.responses = json.loads(str(data["responses"]))
+                self.scopes = json.loads(str(data["scopes"]))
+        except Exception as e:
+            self.logger.error("Error loading semantic cache from %s: %s", self.path, e)
+            self.embeddings = None
+            self.responses = []
+            self.scopes = []
+    
+    def save(self) -> None:
+        """Persist the index to disk."""
+        self._write(self.embeddings, self.responses, self.scopes)
+    
+    def _write(
+        self, embeddings: Optional["np.ndarray"], responses: List[Dict[str, Any]], scopes: List[str]
+    ) -> None:
+        """Write an index to disk, replacing the previous file atomically."""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("wb") as f:
+                self._np.savez(
+                    f,
+                    embeddings=embeddings,
+                    responses=self._np.array(json.dumps(responses, default=str)),
+                    scopes=self._np.array(json.dumps(scopes)),
+                )
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.logger.error("Error saving semantic cache to %s: %s", self.path, e)
@@ -1,23 +1,58 @@
 """Server implementation for the IAC Scanner."""
 
 import asyncio
+import json
 import logging
+import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
-from iac_scanner.plugins import discover_plugins, get_plugin, get_all_plugins
+from iac_scanner.plugins import (
+    discover_plugins,
+    get_all_plugins,
+    get_plugin,
+    get_plugin_capabilities,
+)
+from iac_scanner.core.fswalk import path_exists
 from iac_scanner.core.llm import LLMClient
+from iac_scanner.plugins.base import BasePlugin
+
+# Environment variable used to hand the server configuration to worker processes
+SERVER_CONFIG_ENV = "IAC_SCANNER_SERVER_CONFIG"
+
+_log_configured = False
+
+
+def _configure_logging(level: int):
+    """Configure logging for the package.
+    
+    The root handler is only installed once per process, but the package
+    log level always follows the most recently created server.
+    
+    Args:
+        level: Logging level for the iac_scanner loggers
+    """
+    global _log_configured
+    if not _log_configured:
+        logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s %(message)s")
+        _log_configured = True
+    
+    logging.getLogger("iac_scanner").setLevel(level)
 
 
 class ScanRequest(BaseModel):
     """Model for scan requests."""
     
     path: str = Field(..., description="Path to the IAC code to scan")
-    tools: List[str] = Field(default_list=[], description="Tools to use for scanning")
+    tools: List[str] = Field(default_factory=list, description="Tools to use for scanning")
     config: Dict[str, Any] = Field(default_factory=dict, description="Configuration for the scan")
+    files: Optional[List[str]] = Field(
+        default=None, description="IAC files under path; found by each plugin when omitted"
+    )
 
 
 class ScanResponse(BaseModel):
@@ -35,6 +70,9 @@ class ServerConfig(BaseModel):
     port: int = Field(default=8000, description="Port to bind the server to")
     log_level: str = Field(default="INFO", description="Logging level")
     llm_config: Dict[str, Any] = Field(default_factory=dict, description="Configuration for the LLM")
+    max_concurrent_agents: int = Field(default=3, description="Maximum number of plugins to run concurrently")
+    plugin_timeout: Optional[float] = Field(default=None, description="Timeout in seconds for each plugin scan")
+    workers: int = Field(default=1, description="Number of worker processes")
 
 
 class Server:
@@ -52,15 +90,20 @@ class Server:
             description="Master Control Program (MCP) Server for LLM-based IAC scanning",
             version="0.1.0",
         )
-        self.llm_client = LLMClient(self.config.llm_config)
         
         # Set up logging
         logging_level = getattr(logging, self.config.log_level.upper(), logging.INFO)
-        logging.basicConfig(level=logging_level)
+        _configure_logging(logging_level)
         self.logger = logging.getLogger("iac_scanner")
         
-        # Discover plugins
+        self.llm_client = LLMClient(self.config.llm_config)
+        
+        # Discover plugins and create one shared instance of each
         discover_plugins()
+        self._plugins: Dict[str, BasePlugin] = {
+            name: plugin_class() for name, plugin_class in get_all_plugins().items()
+        }
+        self._validated: Dict[str, bool] = {}
         
         # Set up routes
         self._setup_routes()
@@ -68,6 +111,15 @@ class Server:
     def _setup_routes(self):
         """Set up the API routes."""
         
+        @self.app.on_event("startup")
+        async def validate_plugins():
+            for name, plugin_class in get_all_plugins().items():
+                await self._get_shared_plugin(name, plugin_class)
+        
+        @self.app.on_event("shutdown")
+        async def close_plugins():
+            await asyncio.gather(*(plugin.close() for plugin in self._plugins.values()))
+        
         @self.app.get("/")
         async def root():
             return {"message": "IAC Scanner API"}
@@ -78,40 +130,40 @@ class Server:
             result = {}
             
             for name, plugin_class in plugins.items():
-                plugin = plugin_class()
-                result[name] = await plugin.get_capabilities()
+                result[name] = await get_plugin_capabilities(plugin_class)
             
             return result
         
         @self.app.post("/scan", response_model=ScanResponse)
         async def scan(request: ScanRequest):
+            if not path_exists(request.path):
+                raise HTTPException(status_code=404, detail=f"Path not found: {request.path}")
             path = Path(request.path)
-            if not path.exists():
-                raise HTTPException(status_code=404, detail=f"Path not found: {path}")
             
             # Determine which tools to use
             tools = request.tools or list(get_all_plugins().keys())
             
-            # Run the scan with each tool
+            files = self._request_files(request)
+            
+            # Run the scan with each tool concurrently
             results = {}
             errors = {}
+            semaphore = asyncio.Semaphore(self.config.max_concurrent_agents)
             
-            for tool_name in tools:
-                plugin_class = get_plugin(tool_name)
-                if not plugin_class:
-                    errors[tool_name] = f"Plugin not found: {tool_name}"
+            outcomes = await asyncio.gather(
+                *[self._run_plugin(t, path, files, request.config, semaphore) for t in tools],
+                return_exceptions=True,
+            )
+            for tool_name, outcome in zip(tools, outcomes):
+                if isinstance(outcome, BaseException):
+                    errors[tool_name] = str(outcome)
                     continue
                 
-                try:
-                    plugin = plugin_class(request.config.get(tool_name, {}))
-                    if not await plugin.validate_config():
-                        errors[tool_name] = "Invalid plugin configuration"
-                        continue
-                    
-                    scan_result = await plugin.scan(path)
+                _, scan_result, error = outcome
+                if error is not None:
+                    errors[tool_name] = error
+                else:
                     results[tool_name] = scan_result
-                except Exception as e:
-                    errors[tool_name] = str(e)
             
             # Process the results with the LLM if available
             processed_results = results
@@ -119,20 +171,201 @@ class Server:
                 try:
                     processed_results = await self.llm_client.process_scan_results(results)
                 except Exception as e:
-                    self.logger.error(f"Error processing results with LLM: {e}")
+                    self.logger.error("Error processing results with LLM: %s", e)
             
             return ScanResponse(
                 success=len(errors) == 0,
                 results=processed_results,
                 errors=errors or None
             )
+        
+        @self.app.post("/scan/stream")
+        async def scan_stream(request: ScanRequest):
+            if not path_exists(request.path):
+                raise HTTPException(status_code=404, detail=f"Path not found: {request.path}")
+            path = Path(request.path)
+            
+            return StreamingResponse(
+                self._stream_scan(request, path),
+                media_type="application/x-ndjson"
+            )
+    
+    @staticmethod
+    def _request_files(request: ScanRequest) -> Optional[List[Path]]:
+        """Return the IAC files listed in a request, if any.
+        
+        Args:
+            request: The scan request
+            
+        Returns:
+            The listed files, or None to let each plugin find them itself
+        """
+        if request.files is None:
+            return None
+        return [Path(f) for f in request.files]
+    
+    async def _get_shared_plugin(
+        self, tool_name: str, plugin_class: Type[BasePlugin]
+    ) -> Tuple[BasePlugin, bool]:
+        """Return the shared instance of a plugin and whether it is valid.
+        
+        Instances are created once and reused across requests. A successful
+        validation is remembered so it only runs once per plugin.
+        
+        Args:
+            tool_name: Name of the plugin
+            plugin_class: Currently registered class of the plugin
+            
+        Returns:
+            A (plugin, valid) tuple
+        """
+        plugin = self._plugins.get(tool_name)
+        if type(plugin) is not plugin_class:
+            if plugin is not None:
+                await plugin.close()
+            plugin = self._plugins[tool_name] = plugin_class()
+            self._validated.pop(tool_name, None)
+        
+        if not self._validated.get(tool_name):
+            self._validated[tool_name] = await plugin.validate_config()
+        
+        return plugin, self._validated[tool_name]
+    
+    async def _run_plugin(
+        self,
+        tool_name: str,
+        path: Path,
+        files: Optional[List[Path]],
+        config: Dict[str, Any],
+        semaphore: asyncio.Semaphore,
+    ) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+        """Run a single plugin scan.
+        
+        Args:
+            tool_name: Name of the plugin to run
+            path: Path to the IAC code to scan
+            files: IAC files under path, if collected
+            config: Per-tool configuration from the scan request
+            semaphore: Semaphore bounding concurrent plugin scans
+            
+        Returns:
+            A (tool_name, result, error) tuple where exactly one of result
+            and error is set
+        """
+        plugin_class = get_plugin(tool_name)
+        if not plugin_class:
+            return tool_name, None, f"Plugin not found: {tool_name}"
+        
+        async with semaphore:
+            override = config.get(tool_name)
+            plugin = None
+            try:
+                if override:
+                    plugin = plugin_class(override)
+                    valid = await plugin.validate_config()
+                else:
+                    plugin, valid = await self._get_shared_plugin(tool_name, plugin_class)
+                
+                if not valid:
+                    return tool_name, None, "Invalid plugin configuration"
+                
+                scan_result = await asyncio.wait_for(
+                    plugin.scan(path, files), timeout=self.config.plugin_timeout
+                )
+                return tool_name, scan_result, None
+            except asyncio.TimeoutError:
+                return tool_name, None, f"Scan timed out after {self.config.plugin_timeout} seconds"
+            except Exception as e:
+                return tool_name, None, str(e)
+            finally:
+                # Instances made for one request are not reused, so stop
+                # anything they keep running
+                if override and plugin is not None:
+                    await plugin.close()
+    
+    async def _stream_scan(self, request: ScanRequest, path: Path) -> AsyncIterator[str]:
+        """Run a scan and stream its progress as newline-delimited JSON.
+        
+        Each tool result is emitted as soon as it completes, followed by the
+        LLM analysis as text deltas and a final summary event.
+        
+        Args:
+            request: The scan request
+            path: Path to the IAC code to scan
+            
+        Yields:
+            One JSON-encoded event per line
+        """
+        tools = request.tools or list(get_all_plugins().keys())
+        files = self._request_files(request)
+        semaphore = asyncio.Semaphore(self.config.max_concurrent_agents)
+        
+        results = {}
+        errors = {}
+        
+        tasks = [self._run_plugin(t, path, files, request.config, semaphore) for t in tools]
+        for next_outcome in asyncio.as_completed(tasks):
+            tool_name, scan_result, error = await next_outcome
+            if error is not None:
+                errors[tool_name] = error
+                yield json.dumps({"type": "tool_error", "tool": tool_name, "error": error}) + "\n"
+            else:
+                results[tool_name] = scan_result
+                yield json.dumps(
+                    {"type": "tool_result", "tool": tool_name, "result": scan_result},
+                    default=str
+                ) + "\n"
+        
+        if self.llm_client.is_available():
+            try:
+                async for text in self.llm_client.stream_scan_results(results):
+                    yield json.dumps({"type": "llm_delta", "text": text}) + "\n"
+            except Exception as e:
+                self.logger.error("Error processing results with LLM: %s", e)
+                yield json.dumps({"type": "llm_error", "error": str(e)}) + "\n"
+        
+        yield json.dumps({
+            "type": "done",
+            "success": len(errors) == 0,
+            "errors": errors or None
+        }) + "\n"
     
     def start(self):
-        """Start the server."""
+        """Start the server.
+        
+        With more than one worker, each worker process builds its own app
+        through create_app() from the configuration passed in the environment.
+        """
         import uvicorn
         
-        uvicorn.run(
-            self.app,
-            host=self.config.host,
-            port=self.config.port,
-        ) 
\ No newline at end of file
+        if self.config.workers > 1:
+            os.environ[SERVER_CONFIG_ENV] = self.config.model_dump_json()
+            uvicorn.run(
+                "iac_scanner.core.server:create_app",
+                factory=True,
+                host=self.config.host,
+                port=self.config.port,
+                workers=self.config.workers,
+                log_level=self.config.log_level.lower(),
+            )
+        else:
+            uvicorn.run(
+                self.app,
+                host=self.config.host,
+                port=self.config.port,
+                log_level=self.config.log_level.lower(),
+            )
+
+
+def create_app() -> FastAPI:
+    """Create the server application.
+    
+    Used as the uvicorn app factory so that every worker process builds its
+    own Server instead of sharing one built in the parent.
+    
+    Returns:
+        The FastAPI application of a new Server
+    """
+    raw_config = os.environ.get(SERVER_CONFIG_ENV)
+    config = ServerConfig.model_validate_json(raw_config) if raw_config else ServerConfig()
+    return Server(config).app 
\ No newline at end of file
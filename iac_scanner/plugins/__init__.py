@@ -1,11 +1,13 @@
 """Plugin architecture for IAC scanning tools."""
 
 from importlib import import_module
-from typing import Dict, List, Type
+from typing import Any, Dict, List, Type
 
 from iac_scanner.plugins.base import BasePlugin
 
 _plugins: Dict[str, Type[BasePlugin]] = {}
+_capabilities: Dict[Type[BasePlugin], Dict[str, Any]] = {}
+_discovered = False
 
 def register_plugin(name: str, plugin_class: Type[BasePlugin]):
     """Register a plugin with the system."""
@@ -19,11 +21,26 @@ def get_all_plugins() -> Dict[str, Type[BasePlugin]]:
     """Return all registered plugins."""
     return _plugins
 
+async def get_plugin_capabilities(plugin_class: Type[BasePlugin]) -> Dict[str, Any]:
+    """Return the capabilities of a plugin class, probing it only once."""
+    if plugin_class not in _capabilities:
+        _capabilities[plugin_class] = await plugin_class().get_capabilities()
+    return _capabilities[plugin_class]
+
 def discover_plugins():
-    """Discover and register all available plugins."""
+    """Discover and register all available plugins.
+    
+    Discovery only runs once per process; subsequent calls are no-ops.
+    """
+    global _discovered
+    if _discovered:
+        return
+    
     # Import built-in plugins
     from iac_scanner.plugins import zodiac
     from iac_scanner.plugins import checkov
     
     # Additional plugin discovery logic could be added here
-    # For example, discovering plugins from a specific directory 
\ No newline at end of file
+    # For example, discovering plugins from a specific directory
+    
+    _discovered = True
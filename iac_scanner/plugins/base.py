@@ -1,16 +1,42 @@
 """Base plugin class for IAC scanner plugins."""
 
+import asyncio
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+
+class PluginError(Exception):
+    """Error raised when a plugin's external tool fails."""
+
+
+class _ReturnedProc(NamedTuple):
+    """Outcome of an external tool run, shaped like subprocess.CompletedProcess."""
+    
+    returncode: int
+    stdout: Union[str, bytes]
+    stderr: Union[str, bytes]
 
 
 class BasePlugin(ABC):
-    """Base class for all IAC scanner plugins."""
+    """Base class for all IAC scanner plugins.
+    
+    Plugins that shell out to an external scanner must not use
+    subprocess.run, which would block the event loop and serialize scans that
+    are meant to run concurrently. Use _run_tool, or _exec_tool to check the
+    exit code yourself; processes that are streamed from or kept running go
+    through asyncio.create_subprocess_exec directly.
+    """
     
     name: str = "base"
     description: str = "Base plugin class for IAC scanner"
     
+    # Executable of the external tool, if the plugin runs one from PATH
+    tool_command: Optional[str] = None
+    
+    # Exit codes of the external tool that do not indicate a failure
+    ok_returncodes: Tuple[int, ...] = (0,)
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """Initialize the plugin.
         
@@ -20,12 +46,14 @@ class BasePlugin(ABC):
         self.config = config or {}
     
     @abstractmethod
-    async def scan(self, path: Path) -> Dict[str, Any]:
+    async def scan(self, path: Path, files: Optional[List[Path]] = None) -> Dict[str, Any]:
         """Scan a directory or file for IAC issues.
         
         Args:
             path: Path to the directory or file to scan
-            
+            files: IAC files under path, when the caller already knows them,
+                so that plugins can skip walking the tree themselves (optional)
+                
         Returns:
             A dictionary containing scan results
         """
@@ -47,4 +75,72 @@ class BasePlugin(ABC):
         Returns:
             True if the configuration is valid, False otherwise
         """
-        pass 
\ No newline at end of file
+        pass
+    
+    async def close(self):
+        """Release what the plugin keeps between scans, e.g. a running tool.
+        
+        Callers that create a plugin must close it once they are done with it.
+        """
+    
+    async def _exec_tool(
+        self, argv: Sequence[str], cwd: Optional[Path] = None, text: bool = True
+    ) -> _ReturnedProc:
+        """Run a command without blocking the event loop.
+        
+        Unlike _run_tool, the exit code is not checked, so callers can
+        inspect returncode and stderr themselves as with subprocess.run.
+        
+        Args:
+            argv: Command and arguments to run
+            cwd: Working directory for the command (optional)
+            text: Decode stdout and stderr to str (default True)
+            
+        Returns:
+            The exit code and captured output of the command
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            cwd=str(cwd) if cwd else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await proc.communicate()
+        except BaseException:
+            # Don't leave the tool running when the scan is cancelled
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        
+        if text:
+            return _ReturnedProc(
+                proc.returncode,
+                stdout.decode(errors="replace"),
+                stderr.decode(errors="replace"),
+            )
+        return _ReturnedProc(proc.returncode, stdout, stderr)
+    
+    async def _run_tool(self, argv: Sequence[str], cwd: Optional[Path] = None) -> bytes:
+        """Run the plugin's external tool without blocking the event loop.
+        
+        Args:
+            argv: Command and arguments to run
+            cwd: Working directory for the command (optional)
+            
+        Returns:
+            The standard output of the command
+            
+        Raises:
+            PluginError: If the command exits with a code not in ok_returncodes
+        """
+        result = await self._exec_tool(argv, cwd=cwd, text=False)
+        
+        if result.returncode not in self.ok_returncodes:
+            raise PluginError(
+                f"{argv[0]} exited with code {result.returncode}: "
+                f"{result.stderr.decode(errors='replace').strip()}"
+            )
+        
+        return result.stdout
\ No newline at end of file
@@ -1,11 +1,14 @@
 """Checkov plugin implementation for IAC scanner."""
 
+import asyncio
+import functools
+import itertools
 import json
-import os
-import subprocess
-import tempfile
+import operator
+import re
+import stat
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import yaml
 
 try:
@@ -13,14 +16,237 @@ try:
 except ImportError:
     Runner = None
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 from iac_scanner.plugins.base import BasePlugin
 
+# Frameworks and features reported by get_capabilities, in display order
+_SUPPORTS = ("terraform", "cloudformation", "kubernetes", "docker", "arm", "bicep", "helm", "serverless")
+_FEATURES = ("security_checks", "compliance_checks", "misconfigurations")
+
+# Reports smaller than this are parsed in one go; larger ones are
+# streamed with ijson so bulky fields such as code blocks are never kept.
+STREAM_THRESHOLD = 1 << 20
+
+# Fields of each Checkov check kept in the formatted results, by list
+_CHECK_FIELDS = {
+    "failed_checks": ("check_id", "check_name", "resource", "file_path",
+                      "file_line_range", "guideline", "severity"),
+    "passed_checks": ("check_id", "check_name", "resource", "file_path"),
+    "skipped_checks": ("check_id", "check_name", "resource", "file_path"),
+}
+_FIELD_KEYS = {"check_id": "id", "check_name": "name"}
+
+# Keys of the formatted checks, and getters reading the matching fields
+# from the Runner's check records in one call
+_CHECK_KEYS = {
+    kind: tuple(_FIELD_KEYS.get(field, field) for field in fields)
+    for kind, fields in _CHECK_FIELDS.items()
+}
+_CHECK_GETTERS = {kind: operator.attrgetter(*fields) for kind, fields in _CHECK_FIELDS.items()}
+
+# Per-framework summary line of Checkov's "cli" output
+_CLI_SUMMARY_RE = re.compile(r"Passed checks: (\d+), Failed checks: (\d+), Skipped checks: (\d+)")
+
+# ijson prefixes of the check lists in a single-framework CLI report
+_CLI_CHECK_PREFIXES = {f"results.{kind}.item": kind for kind in _CHECK_FIELDS}
+
+
+def _classify(path: Path) -> Tuple[bool, bool]:
+    """Check whether a path is a directory or a regular file with one stat.
+    
+    Args:
+        path: Path to check
+        
+    Returns:
+        An (is_dir, is_file) tuple; both are False if the path does not exist
+    """
+    try:
+        mode = path.stat().st_mode
+    except (OSError, ValueError):
+        return False, False
+    return stat.S_ISDIR(mode), stat.S_ISREG(mode)
+
+
+def _empty_results() -> Dict[str, Any]:
+    """Create an empty formatted result, as returned by both scan paths."""
+    return {
+        "success": True,
+        "failed_checks": [],
+        "passed_checks": [],
+        "skipped_checks": [],
+        "summary": {
+            "failed": 0,
+            "passed": 0,
+            "skipped": 0,
+            "total": 0,
+        }
+    }
+
+
+def _add_cli_check(
+    formatted_results: Dict[str, Any], kind: str, check: Dict[str, Any], framework: Optional[str]
+) -> None:
+    """Add a check from a Checkov CLI report to the formatted results.
+    
+    Args:
+        formatted_results: Formatted results to add to
+        kind: List the check belongs to (failed_checks, passed_checks, ...)
+        check: Check as reported by the Checkov CLI
+        framework: Framework (check_type) the check was reported for
+    """
+    entry = {key: check.get(field) for key, field in zip(_CHECK_KEYS[kind], _CHECK_FIELDS[kind])}
+    entry["framework"] = framework
+    formatted_results[kind].append(entry)
+    formatted_results["summary"][kind.split("_")[0]] += 1
+
+
+def _finalize_results(formatted_results: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in the total of a formatted result's summary."""
+    summary = formatted_results["summary"]
+    summary["total"] = summary["failed"] + summary["passed"] + summary["skipped"]
+    return formatted_results
+
+
+def _format_cli_report(report: Any) -> Dict[str, Any]:
+    """Format a fully loaded Checkov CLI JSON report.
+    
+    Args:
+        report: One framework's report, or a list of them
+        
+    Returns:
+        Formatted results, or the report unchanged if it is not in the
+        Checkov report format
+    """
+    reports = report if isinstance(report, list) else [report]
+    if not all(isinstance(r, dict) and "results" in r for r in reports):
+        return report
+    
+    formatted_results = _empty_results()
+    for framework_report in reports:
+        framework = framework_report.get("check_type")
+        for kind in _CHECK_FIELDS:
+            for check in framework_report["results"].get(kind) or []:
+                _add_cli_check(formatted_results, kind, check, framework)
+    
+    return _finalize_results(formatted_results)
+
+
+class _CliReportCollector:
+    """Format a Checkov CLI JSON report from a stream of ijson events.
+    
+    Only one check is held in memory at a time, and only the fields listed
+    in _CHECK_FIELDS are kept from it.
+    """
+    
+    def __init__(self):
+        self.results = _empty_results()
+        self._framework = None
+        self._kind = None
+        self._builder = None
+        self._depth = 0
+    
+    def event(self, prefix: str, event: str, value: Any) -> None:
+        """Consume one ijson parse event."""
+        if self._builder is not None:
+            self._build(event, value)
+            return
+        
+        # Multi-framework reports are a list of single-framework reports
+        if prefix.startswith("item."):
+            prefix = prefix[len("item."):]
+        
+        if prefix == "check_type" and event == "string":
+            self._framework = value
+        elif prefix in _CLI_CHECK_PREFIXES and event == "start_map":
+            self._kind = _CLI_CHECK_PREFIXES[prefix]
+            self._builder = ijson.ObjectBuilder()
+            self._build(event, value)
+    
+    def _build(self, event: str, value: Any) -> None:
+        """Feed an event to the check being built, adding it once complete."""
+        self._builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            self._depth += 1
+        elif event in ("end_map", "end_array"):
+            self._depth -= 1
+        
+        if self._depth == 0:
+            _add_cli_check(self.results, self._kind, self._builder.value, self._framework)
+            self._builder = None
+
+
+class _PrefixedReader:
+    """Async reader that replays already buffered bytes before a stream."""
+    
+    def __init__(self, prefix: bytes, stream: asyncio.StreamReader):
+        self._prefix = prefix
+        self._stream = stream
+    
+    async def read(self, n: int = -1) -> bytes:
+        if self._prefix:
+            if n < 0:
+                n = len(self._prefix)
+            chunk, self._prefix = self._prefix[:n], self._prefix[n:]
+            return chunk
+        return await self._stream.read(n)
+
+
+async def _read_cli_report(stream: asyncio.StreamReader) -> Any:
+    """Read and format a Checkov CLI JSON report from a stream.
+    
+    Reports smaller than STREAM_THRESHOLD are loaded in one go, with orjson
+    when it is installed.
+    Larger ones are parsed with ijson as they arrive, so parsing overlaps
+    with the scan and the full document is never buffered.
+    
+    Args:
+        stream: Standard output of the Checkov process
+        
+    Returns:
+        Formatted results, the report unchanged if it is not in the
+        Checkov report format, or None if the report is empty
+    """
+    try:
+        head = await stream.readexactly(STREAM_THRESHOLD)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        return _format_cli_report(_loads(e.partial))
+    
+    if ijson is None:
+        return _format_cli_report(_loads(head + await stream.read()))
+    
+    collector = _CliReportCollector()
+    async for prefix, event, value in ijson.parse_async(_PrefixedReader(head, stream)):
+        collector.event(prefix, event, value)
+    
+    return _finalize_results(collector.results)
+
 
 class CheckovPlugin(BasePlugin):
     """Plugin for integrating with Checkov static analysis tool."""
     
     name = "checkov"
     description = "Plugin for Checkov - Static code analysis tool for infrastructure-as-code"
+    tool_command = "checkov"
+    
+    # Capabilities are static, so the dict is built once and copied per call
+    _CAPS = {
+        "name": name,
+        "description": description,
+        "supports": _SUPPORTS,
+        "features": _FEATURES,
+    }
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """Initialize the Checkov plugin.
@@ -31,12 +257,41 @@ class CheckovPlugin(BasePlugin):
                 - checks: List of specific checks to run
                 - skip_checks: List of checks to skip
                 - use_api: Whether to use the Checkov Python API or CLI
+                - summary_only: Only report check counts, without the
+                  individual checks (default False)
         """
         super().__init__(config)
         self.use_api = self.config.get("use_api", True)
         self.frameworks = self.config.get("frameworks", ["all"])
         self.checks = self.config.get("checks", [])
         self.skip_checks = self.config.get("skip_checks", [])
+        self.summary_only = self.config.get("summary_only", False)
+        
+        # Runner arguments that do not depend on the scanned path
+        self._base_runner_args = {
+            "external_checks_dir": None,
+            "external_modules_download_path": None,
+            "framework": self.frameworks,
+            "skip_check": self.skip_checks,
+            "check": self.checks,
+            "runner_filter": None,
+            "excluded_paths": [],
+        }
+        
+        # CLI arguments that do not depend on the scanned path
+        self._framework_args = () if "all" in self.frameworks else tuple(
+            itertools.chain.from_iterable(("--framework", framework) for framework in self.frameworks)
+        )
+        self._check_args = tuple(itertools.chain.from_iterable(
+            ("--check", check) for check in self.checks
+        ))
+        self._skip_args = tuple(itertools.chain.from_iterable(
+            ("--skip-check", check) for check in self.skip_checks
+        ))
+        
+        # Created on first use by _get_runner and reused across scans
+        self._runner = None
+        self._runner_lock: Optional[asyncio.Lock] = None
     
     async def validate_config(self) -> bool:
         """Validate the plugin configuration.
@@ -51,12 +306,7 @@ class CheckovPlugin(BasePlugin):
         # If using CLI, check if Checkov is available as a command
         if not self.use_api:
             try:
-                result = subprocess.run(
-                    ["checkov", "--version"],
-                    capture_output=True,
-                    text=True,
-                    check=False
-                )
+                result = await self._exec_tool(["checkov", "--version"])
                 return result.returncode == 0
             except FileNotFoundError:
                 return False
@@ -69,31 +319,17 @@ class CheckovPlugin(BasePlugin):
         Returns:
             A dictionary describing the capabilities of this plugin
         """
-        return {
-            "name": self.name,
-            "description": self.description,
-            "supports": [
-                "terraform", 
-                "cloudformation",
-                "kubernetes",
-                "docker",
-                "arm",
-                "bicep",
-                "helm",
-                "serverless"
-            ],
-            "features": [
-                "security_checks",
-                "compliance_checks",
-                "misconfigurations"
-            ]
-        }
+        return dict(self._CAPS)
     
-    async def scan(self, path: Path) -> Dict[str, Any]:
+    async def scan(self, path: Path, files: Optional[List[Path]] = None) -> Dict[str, Any]:
         """Scan a directory or file using Checkov.
         
+        Checkov resolves modules and frameworks from the whole tree itself,
+        so the pre-collected file list is not used.
+        
         Args:
             path: Path to the directory or file to scan
+            files: IAC files under path (unused)
             
         Returns:
             A dictionary containing scan results
@@ -103,6 +339,25 @@ class CheckovPlugin(BasePlugin):
         else:
             return await self._scan_with_cli(path)
     
+    async def _get_runner(self):
+        """Get the shared Checkov Runner, creating it on first use.
+        
+        Creating a Runner sets up Checkov's check registries, so one is
+        created per plugin instance rather than per scan.
+        
+        Returns:
+            The Checkov Runner
+        """
+        if self._runner is None:
+            # Created here rather than in __init__ so it binds to the running loop
+            if self._runner_lock is None:
+                self._runner_lock = asyncio.Lock()
+            async with self._runner_lock:
+                if self._runner is None:
+                    self._runner = Runner()
+        
+        return self._runner
+    
     async def _scan_with_api(self, path: Path) -> Dict[str, Any]:
         """Scan using Checkov's Python API.
         
@@ -114,95 +369,94 @@ class CheckovPlugin(BasePlugin):
         """
         try:
             # Create arguments for the Runner
+            is_dir, is_file = _classify(path)
             runner_args = {
-                "directory": str(path) if path.is_dir() else None,
-                "file": str(path) if path.is_file() else None,
-                "external_checks_dir": None,
-                "external_modules_download_path": None,
-                "framework": self.frameworks,
-                "skip_check": self.skip_checks,
-                "check": self.checks,
-                "runner_filter": None,
-                "excluded_paths": [],
+                **self._base_runner_args,
+                "directory": str(path) if is_dir else None,
+                "file": str(path) if is_file else None,
             }
             
-            # Initialize the runner
-            runner = Runner()
+            runner = await self._get_runner()
             
-            # Run the scan
-            results = runner.run(**runner_args)
+            # Run the scan in a worker thread so other plugins and requests
+            # keep running. The Runner keeps per-run state, so scans sharing
+            # it take turns. All frameworks go through one run: Checkov's
+            # parsing and checks hold the GIL, so splitting frameworks across
+            # threads would not make them run in parallel.
+            loop = asyncio.get_running_loop()
+            async with self._runner_lock:
+                results = await loop.run_in_executor(
+                    None, functools.partial(runner.run, **runner_args)
+                )
             
             # Process results
             checks_results = results.get("results", {})
             
             # Format the results
-            formatted_results = {
-                "success": True,
-                "failed_checks": [],
-                "passed_checks": [],
-                "skipped_checks": [],
-                "summary": {
-                    "failed": 0,
-                    "passed": 0,
-                    "skipped": 0,
-                    "total": 0,
-                }
-            }
+            formatted_results = _empty_results()
             
             # Process each framework's results
             for framework_name, framework_results in checks_results.items():
-                # Add failed checks
-                for failed_check in framework_results.get("failed_checks", []):
-                    formatted_results["failed_checks"].append({
-                        "id": failed_check.check_id,
-                        "name": failed_check.check_name,
-                        "resource": failed_check.resource,
-                        "file_path": failed_check.file_path,
-                        "file_line_range": failed_check.file_line_range,
-                        "guideline": failed_check.guideline,
-                        "severity": failed_check.severity,
-                        "framework": framework_name,
-                    })
-                    formatted_results["summary"]["failed"] += 1
-                
-                # Add passed checks
-                for passed_check in framework_results.get("passed_checks", []):
-                    formatted_results["passed_checks"].append({
-                        "id": passed_check.check_id,
-                        "name": passed_check.check_name,
-                        "resource": passed_check.resource,
-                        "file_path": passed_check.file_path,
-                        "framework": framework_name,
-                    })
-                    formatted_results["summary"]["passed"] += 1
+                if self.summary_only:
+                    for kind in _CHECK_FIELDS:
+                        formatted_results["summary"][kind.split("_")[0]] += len(
+                            framework_results.get(kind, [])
+                        )
+                    continue
                 
-                # Add skipped checks
-                for skipped_check in framework_results.get("skipped_checks", []):
-                    formatted_results["skipped_checks"].append({
-                        "id": skipped_check.check_id,
-                        "name": skipped_check.check_name,
-                        "resource": skipped_check.resource,
-                        "file_path": skipped_check.file_path,
-                        "framework": framework_name,
-                    })
-                    formatted_results["summary"]["skipped"] += 1
+                for kind, getter in _CHECK_GETTERS.items():
+                    keys = _CHECK_KEYS[kind]
+                    checks = [
+                        dict(zip(keys, getter(check)), framework=framework_name)
+                        for check in framework_results.get(kind, [])
+                    ]
+                    formatted_results[kind].extend(checks)
+                    formatted_results["summary"][kind.split("_")[0]] += len(checks)
             
-            formatted_results["summary"]["total"] = (
-                formatted_results["summary"]["failed"] +
-                formatted_results["summary"]["passed"] +
-                formatted_results["summary"]["skipped"]
-            )
-            
-            return formatted_results
+            return _finalize_results(formatted_results)
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
     
+    async def _scan_summary_with_cli(self, cmd: List[str]) -> Dict[str, Any]:
+        """Scan using Checkov's CLI, collecting only the check counts.
+        
+        Checkov's compact text output is parsed for its per-framework
+        summary lines, so no JSON report is produced or parsed.
+        
+        Args:
+            cmd: Checkov command without output options
+            
+        Returns:
+            A dictionary containing scan results with empty check lists
+        """
+        result = await self._exec_tool([*cmd, "--compact", "--output", "cli"])
+        
+        counts = _CLI_SUMMARY_RE.findall(result.stdout)
+        if not counts and result.returncode != 0:
+            return {
+                "success": False,
+                "error": result.stderr,
+                "summary": {}
+            }
+        
+        formatted_results = _empty_results()
+        summary = formatted_results["summary"]
+        for passed, failed, skipped in counts:
+            summary["passed"] += int(passed)
+            summary["failed"] += int(failed)
+            summary["skipped"] += int(skipped)
+        
+        return _finalize_results(formatted_results)
+    
     async def _scan_with_cli(self, path: Path) -> Dict[str, Any]:
         """Scan using Checkov's CLI.
         
+        The JSON report is converted to the same format as _scan_with_api.
+        Large reports are parsed incrementally.
+        
         Args:
             path: Path to the directory or file to scan
             
@@ -210,58 +464,46 @@ class CheckovPlugin(BasePlugin):
             A dictionary containing scan results
         """
         try:
-            # Create a temporary file to store the scan results
-            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp_file:
-                output_file = tmp_file.name
-            
-            # Build the command
-            cmd = ["checkov"]
-            
-            if path.is_dir():
-                cmd.extend(["-d", str(path)])
-            else:
-                cmd.extend(["-f", str(path)])
-            
-            # Add frameworks to scan
-            if self.frameworks and "all" not in self.frameworks:
-                for framework in self.frameworks:
-                    cmd.extend(["--framework", framework])
-            
-            # Add checks to run
-            for check in self.checks:
-                cmd.extend(["--check", check])
+            # Build the command; the report is written to stdout
+            path_args = ("-d" if path.is_dir() else "-f", str(path))
+            cmd = [
+                "checkov",
+                *path_args,
+                *self._framework_args,
+                *self._check_args,
+                *self._skip_args,
+            ]
             
-            # Add checks to skip
-            for check in self.skip_checks:
-                cmd.extend(["--skip-check", check])
+            if self.summary_only:
+                return await self._scan_summary_with_cli(cmd)
             
-            # Add output format
-            cmd.extend(["--output", "json", "--output-file", output_file])
+            cmd.extend(["--output", "json"])
             
-            # Run Checkov
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=False
+            # Run Checkov, parsing its report while it is still being written
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
+            stderr_task = asyncio.ensure_future(proc.stderr.read())
+            try:
+                checkov_results = await _read_cli_report(proc.stdout)
+                stderr = (await stderr_task).decode(errors="replace")
+                returncode = await proc.wait()
+            finally:
+                if proc.returncode is None:
+                    proc.kill()
+                    stderr_task.cancel()
+                    await proc.wait()
             
-            # Parse the results
-            if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                with open(output_file, "r") as f:
-                    checkov_results = json.load(f)
-            else:
+            if checkov_results is None:
                 # If no JSON was produced, create a basic structure with the stderr
                 checkov_results = {
-                    "success": result.returncode == 0,
-                    "error": result.stderr if result.returncode != 0 else None,
+                    "success": returncode == 0,
+                    "error": stderr if returncode != 0 else None,
                     "summary": {}
                 }
             
-            # Clean up the temporary file
-            if os.path.exists(output_file):
-                os.unlink(output_file)
-            
             return checkov_results
         except Exception as e:
             return {
@@ -0,0 +1,64 @@
+"""Persistent driver that runs Zodiac once per request.
+
+Started by ZodiacPlugin as ``python -u driver.py <zodiac main.py>``. Each line
+on stdin is a JSON ``{"id", "input", "output", "stdout", "stderr"}`` request;
+the driver runs Zodiac's main.py in-process with the matching
+``--input``/``--output`` arguments, captures its output to the ``stdout`` and
+``stderr`` files and answers with one JSON line holding the request id and the
+exit code. Output goes to files so replies stay short however much Zodiac
+prints. The interpreter and Zodiac's imports are reused across requests
+instead of being paid for on every scan.
+
+This file is run as a script and must not import iac_scanner.
+"""
+
+import contextlib
+import json
+import os
+import runpy
+import sys
+import traceback
+
+
+def _run(zodiac_main: str, request: dict) -> int:
+    """Run Zodiac's main.py once, as if it had been launched on its own."""
+    sys.argv = [zodiac_main, "--input", request["input"], "--output", request["output"]]
+    
+    returncode = 0
+    with open(request["stdout"], "w") as stdout, open(request["stderr"], "w") as stderr, \
+            contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            runpy.run_path(zodiac_main, run_name="__main__")
+        except SystemExit as e:
+            if e.code is None:
+                returncode = 0
+            elif isinstance(e.code, int):
+                returncode = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                returncode = 1
+        except Exception:
+            traceback.print_exc()
+            returncode = 1
+    
+    return returncode
+
+
+def main():
+    zodiac_main = os.path.abspath(sys.argv[1])
+    sys.path.insert(0, os.path.dirname(zodiac_main))
+    
+    # Keep the real stdout for replies, and send anything else written to
+    # file descriptor 1 (e.g. by child processes) to stderr instead
+    replies = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)
+    
+    for line in sys.stdin:
+        request = json.loads(line)
+        reply = {"id": request["id"], "returncode": _run(zodiac_main, request)}
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,248 @@
 """Zodiac plugin implementation for IAC scanner."""
 
+import asyncio
+import io
+import json
 import os
-import subprocess
+import shutil
 import tempfile
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 import git
 import yaml
 
-from iac_scanner.plugins.base import BasePlugin
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Use the libyaml parser when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+from iac_scanner.core.fswalk import has_iac_files
+from iac_scanner.plugins.base import BasePlugin, PluginError
+
+# Extensions of the Terraform and CloudFormation files Zodiac understands
+ZODIAC_EXTENSIONS = (".tf", ".yaml", ".yml", ".json")
+
+# Frameworks and features reported by get_capabilities, in display order
+_SUPPORTS = ("terraform", "cloudformation")
+_FEATURES = ("semantic_checks", "invariant_mining")
+
+# Script that keeps one Zodiac interpreter running across scans
+ZODIAC_DRIVER = Path(__file__).with_name("driver.py")
+
+# File in the .git directory of the checkouts _checkout_zodiac makes; only
+# those are ever deleted
+ZODIAC_MARKER = "iac_scanner_zodiac"
+
+# Shared checkout of Zodiac, reused across scans and processes
+ZODIAC_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "iac_scanner"
+    / "zodiac"
+)
+
+
+class _ReportSchemaError(Exception):
+    """Raised when a Zodiac report is not a single mapping."""
+
+
+class _DriverError(Exception):
+    """Raised when the persistent Zodiac driver cannot be used."""
+
+
+class _DriversBusy(Exception):
+    """Raised when every persistent Zodiac driver is running a scan."""
+
+
+class _EventLoader(yaml.composer.Composer, yaml.constructor.SafeConstructor, yaml.resolver.Resolver):
+    """Compose and construct YAML nodes from a stream of parse events.
+    
+    This lets the (libyaml) parser drive the pure-Python composer, so a
+    report can be built one value at a time rather than as a single tree.
+    """
+    
+    def __init__(self, events: Iterator[yaml.Event]):
+        self._events = events
+        self._current = None
+        yaml.composer.Composer.__init__(self)
+        yaml.constructor.SafeConstructor.__init__(self)
+        yaml.resolver.Resolver.__init__(self)
+    
+    def peek_event(self) -> yaml.Event:
+        if self._current is None:
+            self._current = next(self._events)
+        return self._current
+    
+    def check_event(self, *choices) -> bool:
+        event = self.peek_event()
+        return not choices or isinstance(event, choices)
+    
+    def get_event(self) -> yaml.Event:
+        event = self.peek_event()
+        self._current = None
+        return event
+    
+    def load_value(self) -> Any:
+        """Build the value starting at the current event."""
+        return self.construct_document(self.compose_node(None, None))
+
+
+def _stream_zodiac_yaml(f) -> Iterator[Tuple[str, Any]]:
+    """Read the top-level entries of a Zodiac report incrementally.
+    
+    A findings list is yielded as ("findings", []) followed by one
+    ("finding", finding) per finding, so only one finding's node tree is
+    held in memory at once. Every other top-level entry is yielded as
+    (key, value).
+    
+    Args:
+        f: File object positioned at the start of the report
+        
+    Raises:
+        _ReportSchemaError: If the report is not a single mapping
+    """
+    loader = _EventLoader(yaml.parse(f, Loader=_YamlLoader))
+    loader.get_event()
+    if not loader.check_event(yaml.DocumentStartEvent):
+        raise _ReportSchemaError("empty report")
+    loader.get_event()
+    if not loader.check_event(yaml.MappingStartEvent):
+        raise _ReportSchemaError("report is not a mapping")
+    loader.get_event()
+    
+    while not loader.check_event(yaml.MappingEndEvent):
+        key = loader.load_value()
+        if key == "findings" and loader.check_event(yaml.SequenceStartEvent):
+            loader.get_event()
+            yield "findings", []
+            while not loader.check_event(yaml.SequenceEndEvent):
+                yield "finding", loader.load_value()
+            loader.get_event()
+        else:
+            yield key, loader.load_value()
+    
+    loader.get_event()
+    loader.get_event()
+    if not loader.check_event(yaml.StreamEndEvent):
+        raise _ReportSchemaError("report has more than one document")
+
+
+def _load_zodiac_report(f) -> Any:
+    """Load a Zodiac report, streaming its findings when possible.
+    
+    Args:
+        f: Seekable file object positioned at the start of the report
+        
+    Returns:
+        The parsed report
+    """
+    report: Dict[str, Any] = {}
+    try:
+        for key, value in _stream_zodiac_yaml(f):
+            if key == "finding":
+                report["findings"].append(value)
+            else:
+                report[key] = value
+        return report
+    except (_ReportSchemaError, yaml.YAMLError):
+        # Fall back to loading the whole document
+        f.seek(0)
+        return yaml.load(f, Loader=_YamlLoader)
+
+
+def _read_text(path: str) -> str:
+    """Read a text file, or return "" if it does not exist."""
+    try:
+        with open(path, "r", errors="replace") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+def _normalize_repo_url(url: str) -> str:
+    """Drop differences that do not change which repository a URL names."""
+    url = url.strip().rstrip("/")
+    if url.endswith(".git"):
+        url = url[:-len(".git")].rstrip("/")
+    return url
+
+
+def _checkout_origin(checkout: Path) -> Optional[str]:
+    """Get the origin URL of an existing checkout, if there is one."""
+    if not (checkout / ".git").exists():
+        return None
+    try:
+        return git.Repo(checkout).remotes.origin.url
+    except (git.InvalidGitRepositoryError, AttributeError, ValueError):
+        return None
+
+
+def _checkout_zodiac(repo_url: str, checkout: Path) -> None:
+    """Shallow-clone Zodiac, or refresh an existing shallow clone.
+    
+    A lock file next to the checkout keeps concurrent processes from
+    cloning into the same directory. Clones go to a temporary sibling
+    directory that is renamed into place, and an existing directory is only
+    replaced if it is a checkout this function made (see ZODIAC_MARKER).
+    This call blocks.
+    
+    Args:
+        repo_url: URL of the Zodiac Git repository
+        checkout: Directory to clone into
+        
+    Raises:
+        PluginError: If checkout is a directory the plugin did not create
+    """
+    checkout.parent.mkdir(parents=True, exist_ok=True)
+    with open(checkout.parent / f"{checkout.name}.lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        
+        origin = _checkout_origin(checkout)
+        if origin is not None and _normalize_repo_url(origin) == _normalize_repo_url(repo_url):
+            repo = git.Repo(checkout)
+            try:
+                repo.remotes.origin.fetch(depth=1)
+                repo.git.reset("--hard", "FETCH_HEAD")
+            except git.GitCommandError:
+                # Keep using the existing checkout, e.g. when offline
+                pass
+            (checkout / ".git" / ZODIAC_MARKER).touch()
+            return
+        
+        if checkout.exists():
+            if (checkout / ".git" / ZODIAC_MARKER).exists():
+                # A clone of another zodiac_repo
+                shutil.rmtree(checkout)
+            elif checkout.is_dir() and not any(checkout.iterdir()):
+                checkout.rmdir()
+            else:
+                raise PluginError(
+                    f"Not replacing {checkout}: it is not a Zodiac checkout made by "
+                    "iac_scanner; set cache_dir to an empty or new directory"
+                )
+        
+        # Clone next to the checkout, removing what an interrupted clone may
+        # have left behind, so a failed clone never leaves a partial checkout
+        staging = checkout.parent / f"{checkout.name}.clone"
+        if staging.exists():
+            shutil.rmtree(staging)
+        try:
+            git.Repo.clone_from(
+                repo_url,
+                staging,
+                multi_options=["--depth=1", "--single-branch", "--filter=blob:none"],
+            )
+            (staging / ".git" / ZODIAC_MARKER).touch()
+            staging.rename(checkout)
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging)
 
 
 class ZodiacPlugin(BasePlugin):
@@ -17,6 +251,14 @@ class ZodiacPlugin(BasePlugin):
     name = "zodiac"
     description = "Plugin for Zodiac - Unearthing Semantic Checks for Cloud IAC"
     
+    # Capabilities are static, so the dict is built once and copied per call
+    _CAPS = {
+        "name": name,
+        "description": description,
+        "supports": _SUPPORTS,
+        "features": _FEATURES,
+    }
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """Initialize the Zodiac plugin.
         
@@ -24,12 +266,36 @@ class ZodiacPlugin(BasePlugin):
             config: Configuration dictionary. Supported keys:
                 - zodiac_repo: URL to the Zodiac Git repository
                 - zodiac_path: Local path to the Zodiac installation
+                - cache_dir: Where to clone Zodiac when zodiac_path is not set
+                  (default: ~/.cache/iac_scanner/zodiac)
+                - persistent_driver: Run scans through long-lived Zodiac
+                  processes instead of starting Python for each (default True)
+                - max_drivers: Most long-lived processes to keep; scans beyond
+                  that start Python for themselves (default 4)
         """
         super().__init__(config)
         self.zodiac_path = self.config.get("zodiac_path")
         self.zodiac_repo = self.config.get(
             "zodiac_repo", "https://github.com/824728350/Zodiac.git"
         )
+        self.cache_dir = Path(self.config.get("cache_dir", ZODIAC_CACHE_DIR))
+        
+        # Whether to read Zodiac's report from stdout; cleared if Zodiac
+        # cannot write it there
+        self._pipe_output = os.path.exists("/dev/stdout")
+        
+        # Resolves to the Zodiac installation once it is available; shared
+        # by concurrent scans so Zodiac is only located or cloned once
+        self._zodiac_ready: Optional[asyncio.Future] = None
+        
+        # Long-lived Zodiac processes (see driver.py), started as concurrent
+        # scans need them; each runs one scan at a time
+        self._use_driver = self.config.get("persistent_driver", True)
+        self._max_drivers = self.config.get("max_drivers", 4)
+        self._drivers: Set[asyncio.subprocess.Process] = set()
+        self._idle_drivers: List[asyncio.subprocess.Process] = []
+        self._driver_slots = 0
+        self._driver_requests = 0
     
     async def validate_config(self) -> bool:
         """Validate the plugin configuration.
@@ -44,12 +310,9 @@ class ZodiacPlugin(BasePlugin):
             # If no path is specified, we'll clone on demand
             return True
         
-        # Check if the specified path contains a valid Zodiac installation
-        zodiac_path = Path(self.zodiac_path)
-        return (
-            zodiac_path.exists()
-            and (zodiac_path / "main.py").exists()
-        )
+        # Check if the specified path contains a valid Zodiac installation;
+        # main.py existing implies the directory does, so one stat suffices
+        return (Path(self.zodiac_path) / "main.py").exists()
     
     async def get_capabilities(self) -> Dict[str, Any]:
         """Get the capabilities of this plugin.
@@ -57,18 +320,36 @@ class ZodiacPlugin(BasePlugin):
         Returns:
             A dictionary describing the capabilities of this plugin
         """
-        return {
-            "name": self.name,
-            "description": self.description,
-            "supports": ["terraform", "cloudformation"],
-            "features": ["semantic_checks", "invariant_mining"]
-        }
+        return dict(self._CAPS)
     
     async def _ensure_zodiac_available(self) -> Path:
         """Ensure that Zodiac is available locally.
         
-        If zodiac_path is specified, it will be used. Otherwise, Zodiac
-        will be cloned from the repository to a temporary directory.
+        Concurrent callers share a single lookup or clone, and its result is
+        reused by later scans. A failed attempt is retried by the next caller.
+        
+        Returns:
+            Path to the Zodiac installation
+        """
+        task = self._zodiac_ready
+        if task is None:
+            task = self._zodiac_ready = asyncio.ensure_future(self._prepare_zodiac())
+            task.add_done_callback(self._zodiac_prepared)
+        
+        # A cancelled caller must not cancel the lookup the others wait for
+        return await asyncio.shield(task)
+    
+    def _zodiac_prepared(self, task: "asyncio.Future[Path]") -> None:
+        """Forget a failed lookup so that the next caller retries it."""
+        if task.cancelled() or task.exception() is not None:
+            if self._zodiac_ready is task:
+                self._zodiac_ready = None
+    
+    async def _prepare_zodiac(self) -> Path:
+        """Locate or clone Zodiac.
+        
+        If zodiac_path is specified, it will be used. Otherwise, a shallow
+        clone of the repository in cache_dir is created or refreshed.
         
         Returns:
             Path to the Zodiac installation
@@ -76,50 +357,288 @@ class ZodiacPlugin(BasePlugin):
         if self.zodiac_path and await self.validate_config():
             return Path(self.zodiac_path)
         
-        # Clone Zodiac to a temporary directory
-        tmp_dir = Path(tempfile.mkdtemp())
-        git.Repo.clone_from(self.zodiac_repo, tmp_dir)
+        # Clone Zodiac into the shared cache without blocking the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _checkout_zodiac, self.zodiac_repo, self.cache_dir)
         
         # Set the path for future use
-        self.zodiac_path = str(tmp_dir)
-        return tmp_dir
+        self.zodiac_path = str(self.cache_dir)
+        return self.cache_dir
     
-    async def scan(self, path: Path) -> Dict[str, Any]:
+    async def scan(self, path: Path, files: Optional[List[Path]] = None) -> Dict[str, Any]:
         """Scan a directory or file using Zodiac.
         
         Args:
             path: Path to the directory or file to scan
-            
+            files: IAC files under path (optional). When path is a directory
+                without Terraform or CloudFormation files, Zodiac is not run
+                and the result is marked as skipped.
+                
         Returns:
             A dictionary containing scan results
         """
+        if path.is_dir():
+            if files is not None:
+                has_files = any(f.suffix in ZODIAC_EXTENSIONS for f in files)
+            else:
+                has_files = await has_iac_files(path, ZODIAC_EXTENSIONS)
+        else:
+            # A file named explicitly is scanned whatever its extension
+            has_files = True
+        
+        if not has_files:
+            return {
+                "success": True,
+                "skipped": True,
+                "reason": "No Terraform or CloudFormation files found",
+                "results": {},
+            }
+        
         zodiac_path = await self._ensure_zodiac_available()
         
-        # Create a temporary file to store the scan results
-        with tempfile.NamedTemporaryFile(suffix=".yaml", delete=False) as tmp_file:
-            output_file = tmp_file.name
+        if self._use_driver:
+            try:
+                return await self._scan_with_driver(zodiac_path, path)
+            except _DriversBusy:
+                # Run this scan in a process of its own
+                pass
+            except _DriverError:
+                # Start Python for each scan from now on
+                self._use_driver = False
+                await self.close()
+        
+        if self._pipe_output:
+            try:
+                # Have Zodiac write its report to stdout, skipping the
+                # temporary file round-trip
+                result = await self._exec_tool(self._command(zodiac_path, path, "/dev/stdout"))
+                if result.returncode in self.ok_returncodes:
+                    return {
+                        "success": True,
+                        "results": _load_zodiac_report(io.StringIO(result.stdout)),
+                        "stderr": result.stderr
+                    }
+            except yaml.YAMLError:
+                # Zodiac printed more than its report to stdout
+                pass
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": str(e)
+                }
+            
+            # Zodiac rejected /dev/stdout or mixed other output into it; use a
+            # temporary file for this and later scans
+            self._pipe_output = False
+        
+        return await self._scan_with_output_file(zodiac_path, path)
+    
+    async def _scan_with_driver(self, zodiac_path: Path, path: Path) -> Dict[str, Any]:
+        """Run Zodiac through an idle persistent driver process.
         
+        Args:
+            zodiac_path: Path to the Zodiac installation
+            path: Path to the directory or file to scan
+            
+        Returns:
+            A dictionary containing scan results
+            
+        Raises:
+            _DriversBusy: If every driver is busy and no more may be started
+            _DriverError: If the driver cannot be started or stops responding
+        """
+        with tempfile.TemporaryDirectory(prefix="zodiac-") as tmp_dir:
+            output_file = os.path.join(tmp_dir, "report.yaml")
+            reply = await self._driver_request(zodiac_path, str(path), output_file)
+            stdout = _read_text(os.path.join(tmp_dir, "stdout"))
+            stderr = _read_text(os.path.join(tmp_dir, "stderr"))
+            
+            try:
+                if reply["returncode"] not in self.ok_returncodes:
+                    cmd = self._command(zodiac_path, path, output_file)
+                    return {
+                        "success": False,
+                        "error": f"Command {cmd!r} returned non-zero exit status {reply['returncode']}.",
+                        "stdout": stdout,
+                        "stderr": stderr
+                    }
+                
+                try:
+                    with open(output_file, "r") as f:
+                        scan_results = _load_zodiac_report(f)
+                except FileNotFoundError:
+                    scan_results = {}
+                
+                return {
+                    "success": True,
+                    "results": scan_results,
+                    "stdout": stdout,
+                    "stderr": stderr
+                }
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": str(e)
+                }
+    
+    async def _acquire_driver(self, zodiac_path: Path) -> asyncio.subprocess.Process:
+        """Take an idle driver, starting one if all of them are busy.
+        
+        Args:
+            zodiac_path: Path to the Zodiac installation
+            
+        Returns:
+            A driver that no other scan is using
+            
+        Raises:
+            _DriversBusy: If max_drivers drivers are already busy
+            _DriverError: If a new driver cannot be started
+        """
+        while self._idle_drivers:
+            driver = self._idle_drivers.pop()
+            if driver.returncode is None:
+                return driver
+            self._drivers.discard(driver)
+            self._driver_slots -= 1
+        
+        if self._driver_slots >= self._max_drivers:
+            raise _DriversBusy()
+        
+        # Reserve the slot before awaiting so concurrent scans see it taken
+        self._driver_slots += 1
         try:
-            # Run Zodiac on the specified path
-            # Note: This is a simplified example. The actual command might differ.
-            result = subprocess.run(
-                [
-                    "python",
-                    str(zodiac_path / "main.py"),
-                    "--input", str(path),
-                    "--output", output_file
-                ],
-                capture_output=True,
-                text=True,
-                check=True
+            driver = await asyncio.create_subprocess_exec(
+                "python", "-u", str(ZODIAC_DRIVER), str(zodiac_path / "main.py"),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
             )
+        except BaseException as e:
+            self._driver_slots -= 1
+            if isinstance(e, OSError):
+                raise _DriverError(f"Zodiac driver failed to start: {e}") from e
+            raise
+        
+        self._drivers.add(driver)
+        return driver
+    
+    async def _driver_request(self, zodiac_path: Path, input_path: str, output_file: str) -> Dict[str, Any]:
+        """Send one scan to an idle driver, starting one if needed.
+        
+        Args:
+            zodiac_path: Path to the Zodiac installation
+            input_path: Path to scan
+            output_file: File for Zodiac to write its report to; its stdout
+                and stderr are written to "stdout" and "stderr" next to it
+                
+        Returns:
+            The driver's reply with the returncode
             
-            # Parse the output
-            if os.path.exists(output_file):
-                with open(output_file, "r") as f:
-                    scan_results = yaml.safe_load(f)
-            else:
-                scan_results = {}
+        Raises:
+            _DriversBusy: If max_drivers drivers are already busy
+            _DriverError: If the driver cannot be started, stops responding or
+                answers a different request
+        """
+        driver = await self._acquire_driver(zodiac_path)
+        self._driver_requests += 1
+        request_id = self._driver_requests
+        output_dir = os.path.dirname(output_file)
+        request = {
+            "id": request_id,
+            "input": input_path,
+            "output": output_file,
+            "stdout": os.path.join(output_dir, "stdout"),
+            "stderr": os.path.join(output_dir, "stderr"),
+        }
+        try:
+            driver.stdin.write(json.dumps(request).encode() + b"\n")
+            await driver.stdin.drain()
+            reply = json.loads(await driver.stdout.readline())
+            if reply.get("id") != request_id:
+                raise _DriverError(
+                    f"Zodiac driver answered request {reply.get('id')!r} instead of {request_id}"
+                )
+        except BaseException as e:
+            # The reply to an interrupted request (e.g. a scan cancelled by a
+            # timeout) would be read by the next scan, so never reuse the
+            # driver after one
+            if driver in self._drivers:
+                self._drivers.discard(driver)
+                self._driver_slots -= 1
+            if driver.returncode is None:
+                driver.kill()
+            await driver.wait()
+            if isinstance(e, (OSError, ValueError)):
+                raise _DriverError(f"Zodiac driver failed: {e}") from e
+            raise
+        
+        if driver in self._drivers:
+            self._idle_drivers.append(driver)
+        return reply
+    
+    async def close(self):
+        """Stop the persistent driver processes."""
+        drivers = list(self._drivers)
+        self._drivers.clear()
+        self._idle_drivers.clear()
+        self._driver_slots = 0
+        await asyncio.gather(*(self._stop_driver(driver) for driver in drivers))
+    
+    @staticmethod
+    async def _stop_driver(driver: asyncio.subprocess.Process):
+        """Ask a driver to exit, killing it if it does not."""
+        if driver.returncode is None:
+            driver.stdin.close()
+            try:
+                await asyncio.wait_for(driver.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                driver.kill()
+                await driver.wait()
+    
+    @staticmethod
+    def _command(zodiac_path: Path, path: Path, output_file: str) -> List[str]:
+        """Build the command that runs Zodiac on a path."""
+        # Note: This is a simplified example. The actual command might differ.
+        return [
+            "python",
+            str(zodiac_path / "main.py"),
+            "--input", str(path),
+            "--output", output_file
+        ]
+    
+    async def _scan_with_output_file(self, zodiac_path: Path, path: Path) -> Dict[str, Any]:
+        """Run Zodiac with its report written to a temporary file.
+        
+        Args:
+            zodiac_path: Path to the Zodiac installation
+            path: Path to the directory or file to scan
+            
+        Returns:
+            A dictionary containing scan results
+        """
+        try:
+            # The directory, and the report in it, is removed on exit
+            with tempfile.TemporaryDirectory(prefix="zodiac-") as tmp_dir:
+                output_file = os.path.join(tmp_dir, "report.yaml")
+                
+                # Run Zodiac on the specified path
+                cmd = self._command(zodiac_path, path, output_file)
+                result = await self._exec_tool(cmd)
+                
+                if result.returncode not in self.ok_returncodes:
+                    return {
+                        "success": False,
+                        "error": f"Command {cmd!r} returned non-zero exit status {result.returncode}.",
+                        "stdout": result.stdout,
+                        "stderr": result.stderr
+                    }
+                
+                # Parse the output
+                try:
+                    with open(output_file, "r") as f:
+                        scan_results = _load_zodiac_report(f)
+                except FileNotFoundError:
+                    scan_results = {}
             
             return {
                 "success": True,
@@ -127,19 +646,8 @@ class ZodiacPlugin(BasePlugin):
                 "stdout": result.stdout,
                 "stderr": result.stderr
             }
-        except subprocess.CalledProcessError as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "stdout": e.stdout,
-                "stderr": e.stderr
-            }
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(output_file):
-                os.unlink(output_file) 
\ No newline at end of file
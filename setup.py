@@ -8,6 +8,7 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     include_package_data=True,
+    package_data={"iac_scanner.core": ["kb/*.md"]},
     install_requires=requirements,
     entry_points={
         "console_scripts": [
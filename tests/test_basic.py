@@ -1,15 +1,28 @@
 """Basic tests for the IAC Scanner."""
 
+import asyncio
+import io
+import json
 import os
 import sys
+import git
 import pytest
+import yaml
 from pathlib import Path
+from types import SimpleNamespace
+from click.testing import CliRunner
+from fastapi.testclient import TestClient
 
 # Add the parent directory to the path so we can import the package
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from iac_scanner.plugins.base import BasePlugin
-from iac_scanner.plugins import register_plugin, get_plugin
+from iac_scanner import cli
+from iac_scanner.core.fswalk import collect_iac_files, has_iac_files
+from iac_scanner.core.server import ScanRequest, Server, ServerConfig
+from iac_scanner.plugins.base import BasePlugin, PluginError
+from iac_scanner.plugins import register_plugin, get_plugin, get_plugin_capabilities
+from iac_scanner.plugins.checkov import plugin as checkov_plugin
+from iac_scanner.plugins.zodiac.plugin import ZodiacPlugin, _load_zodiac_report
 
 
 class MockPlugin(BasePlugin):
@@ -18,7 +31,7 @@ class MockPlugin(BasePlugin):
     name = "mock"
     description = "Mock plugin for testing"
     
-    async def scan(self, path):
+    async def scan(self, path, files=None):
         """Mock scan method."""
         return {
             "success": True,
@@ -41,11 +54,75 @@ class MockPlugin(BasePlugin):
         return True
 
 
-def test_plugin_registration():
-    """Test plugin registration."""
-    # Register the mock plugin
-    register_plugin("mock", MockPlugin)
+class RecordingPlugin(MockPlugin):
+    """Mock plugin that records its instances and concurrent scans."""
+    
+    name = "recording"
+    instances = []
+    closed = []
+    validations = 0
+    active = 0
+    max_active = 0
+    
+    def __init__(self, config=None):
+        super().__init__(config)
+        RecordingPlugin.instances.append(self)
+    
+    async def scan(self, path, files=None):
+        """Scan for config["delay"] seconds, reporting the config."""
+        RecordingPlugin.active += 1
+        RecordingPlugin.max_active = max(RecordingPlugin.max_active, RecordingPlugin.active)
+        try:
+            await asyncio.sleep(self.config.get("delay", 0))
+        finally:
+            RecordingPlugin.active -= 1
+        return {"success": True, "results": {"config": self.config}}
     
+    async def validate_config(self):
+        """Count validations."""
+        RecordingPlugin.validations += 1
+        return True
+    
+    async def close(self):
+        """Record that the instance was closed."""
+        RecordingPlugin.closed.append(self)
+
+
+@pytest.fixture
+def recording_plugin(monkeypatch):
+    """Register RecordingPlugin with fresh counters."""
+    from iac_scanner.plugins import _plugins
+    
+    monkeypatch.setitem(_plugins, "recording", RecordingPlugin)
+    for attr, value in (
+        ("instances", []), ("closed", []), ("validations", 0), ("active", 0), ("max_active", 0)
+    ):
+        monkeypatch.setattr(RecordingPlugin, attr, value)
+    return RecordingPlugin
+
+
+@pytest.fixture
+def server(recording_plugin):
+    """Create a Server with RecordingPlugin registered and the LLM disabled."""
+    server = Server(ServerConfig(max_concurrent_agents=2, plugin_timeout=0.5))
+    server.llm_client._bedrock_client = None
+    return server
+
+
+@pytest.fixture(scope="session")
+def mock_plugin():
+    """Register MockPlugin once, restoring the plugin registry afterwards."""
+    from iac_scanner.plugins import _plugins
+    
+    saved = dict(_plugins)
+    register_plugin("mock", MockPlugin)
+    yield MockPlugin
+    _plugins.clear()
+    _plugins.update(saved)
+
+
+def test_plugin_registration(mock_plugin):
+    """Test plugin registration."""
     # Get the plugin
     plugin_class = get_plugin("mock")
     
@@ -62,11 +139,8 @@ def test_plugin_registration():
 
 
 @pytest.mark.asyncio
-async def test_plugin_capabilities():
+async def test_plugin_capabilities(mock_plugin):
     """Test plugin capabilities."""
-    # Register the mock plugin
-    register_plugin("mock", MockPlugin)
-    
     # Get the plugin
     plugin_class = get_plugin("mock")
     plugin = plugin_class()
@@ -83,11 +157,8 @@ async def test_plugin_capabilities():
 
 
 @pytest.mark.asyncio
-async def test_plugin_scan():
+async def test_plugin_scan(mock_plugin):
     """Test plugin scan."""
-    # Register the mock plugin
-    register_plugin("mock", MockPlugin)
-    
     # Get the plugin
     plugin_class = get_plugin("mock")
     plugin = plugin_class()
@@ -98,4 +169,573 @@ async def test_plugin_scan():
     # Check scan result
     assert scan_result["success"] is True
     assert "results" in scan_result
-    assert "issues" in scan_result["results"] 
\ No newline at end of file
+    assert "issues" in scan_result["results"]
+
+
+@pytest.mark.asyncio
+async def test_plugin_capabilities_cached():
+    """Test that plugin capabilities are only probed once."""
+    calls = []
+    
+    class CountingPlugin(MockPlugin):
+        async def get_capabilities(self):
+            calls.append(1)
+            return await super().get_capabilities()
+    
+    first = await get_plugin_capabilities(CountingPlugin)
+    second = await get_plugin_capabilities(CountingPlugin)
+    
+    assert first == second
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_collect_iac_files(tmp_path):
+    """Test collecting IAC files from a directory tree."""
+    (tmp_path / "modules" / "s3").mkdir(parents=True)
+    (tmp_path / ".terraform").mkdir()
+    (tmp_path / "main.tf").write_text("")
+    (tmp_path / "modules" / "s3" / "bucket.tf").write_text("")
+    (tmp_path / "template.yaml").write_text("")
+    (tmp_path / "README.md").write_text("")
+    (tmp_path / ".terraform" / "cached.tf").write_text("")
+    
+    files = await collect_iac_files(tmp_path)
+    
+    assert files == sorted([
+        tmp_path / "main.tf",
+        tmp_path / "modules" / "s3" / "bucket.tf",
+        tmp_path / "template.yaml",
+    ])
+    assert await collect_iac_files(tmp_path / "main.tf") == [tmp_path / "main.tf"]
+    
+    assert await has_iac_files(tmp_path) is True
+    assert await has_iac_files(tmp_path / "modules") is True
+    (tmp_path / "docs" / "node_modules").mkdir(parents=True)
+    (tmp_path / "docs" / "node_modules" / "package.json").write_text("")
+    assert await has_iac_files(tmp_path / "docs") is False
+
+
+@pytest.mark.asyncio
+async def test_plugin_run_tool(tmp_path):
+    """Test running an external tool from a plugin."""
+    plugin = MockPlugin()
+    
+    output = await plugin._run_tool([sys.executable, "-c", "print('ok')"])
+    assert output.strip() == b"ok"
+    
+    with pytest.raises(PluginError):
+        await plugin._run_tool([sys.executable, "-c", "import sys; sys.exit(2)"])
+    
+    # A cancelled run does not leave the tool running
+    pid_file = tmp_path / "pid"
+    task = asyncio.ensure_future(plugin._exec_tool([
+        sys.executable, "-c",
+        f"import os, time; open({str(pid_file)!r}, 'w').write(str(os.getpid())); time.sleep(30)",
+    ]))
+    while not pid_file.exists() or not pid_file.read_text():
+        await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+
+@pytest.mark.asyncio
+async def test_zodiac_scan_subprocess(tmp_path):
+    """Test that the Zodiac plugin runs Zodiac as a subprocess."""
+    zodiac_dir = tmp_path / "zodiac"
+    zodiac_dir.mkdir()
+    main_py = (
+        "import sys\n"
+        "out = sys.argv[sys.argv.index('--output') + 1]\n"
+        "open(out, 'w').write('findings:\\n- id: Z1\\n')\n"
+        "sys.exit(int('--fail' in open(sys.argv[sys.argv.index('--input') + 1]).read()))\n"
+    )
+    (zodiac_dir / "main.py").write_text(main_py)
+    target = tmp_path / "main.tf"
+    target.write_text("")
+    
+    # Consecutive scans go through one persistent driver process
+    plugin = ZodiacPlugin({"zodiac_path": str(zodiac_dir)})
+    try:
+        result = await plugin.scan(target)
+        assert result["success"] is True
+        assert result["results"] == {"findings": [{"id": "Z1"}]}
+        [driver] = plugin._idle_drivers
+        
+        target.write_text("--fail")
+        result = await plugin.scan(target)
+        assert result["success"] is False
+        assert "exit status 1" in result["error"]
+        assert plugin._idle_drivers == [driver]
+    finally:
+        await plugin.close()
+    
+    # Without the driver, Zodiac is started for each scan
+    target.write_text("")
+    plugin = ZodiacPlugin({"zodiac_path": str(zodiac_dir), "persistent_driver": False})
+    result = await plugin.scan(target)
+    assert result["success"] is True
+    assert result["results"] == {"findings": [{"id": "Z1"}]}
+    
+    # Zodiac that logs to stdout falls back to a temporary report file
+    plugin = ZodiacPlugin({"zodiac_path": str(zodiac_dir), "persistent_driver": False})
+    (zodiac_dir / "main.py").write_text("print('{starting')\n" + main_py)
+    result = await plugin.scan(target)
+    assert result["results"] == {"findings": [{"id": "Z1"}]}
+    assert plugin._pipe_output is False
+    
+    target.write_text("--fail")
+    result = await plugin.scan(target)
+    assert result["success"] is False
+    assert "exit status 1" in result["error"]
+    
+    # A directory without Terraform or CloudFormation files is skipped, but
+    # a single file is scanned whatever its extension
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "README.md").write_text("")
+    for files in (None, await collect_iac_files(docs)):
+        result = await plugin.scan(docs, files)
+        assert result["skipped"] is True
+        assert result["results"] == {}
+    
+    template = tmp_path / "stack.template"
+    template.write_text("")
+    result = await plugin.scan(template)
+    assert "skipped" not in result
+    assert result["results"] == {"findings": [{"id": "Z1"}]}
+
+
+@pytest.mark.asyncio
+async def test_zodiac_driver_large_output(tmp_path):
+    """Test that the driver handles scans that print a lot."""
+    zodiac_dir = tmp_path / "zodiac"
+    zodiac_dir.mkdir()
+    (zodiac_dir / "main.py").write_text(
+        "import sys\n"
+        "print('x' * 200000)\n"
+        "print('y' * 200000, file=sys.stderr)\n"
+        "open(sys.argv[sys.argv.index('--output') + 1], 'w').write('findings: []\\n')\n"
+    )
+    target = tmp_path / "main.tf"
+    target.write_text("")
+    
+    plugin = ZodiacPlugin({"zodiac_path": str(zodiac_dir)})
+    try:
+        result = await plugin.scan(target)
+        assert result["success"] is True
+        assert result["stdout"] == "x" * 200000 + "\n"
+        assert result["stderr"] == "y" * 200000 + "\n"
+        assert plugin._use_driver is True
+        assert len(plugin._idle_drivers) == 1
+    finally:
+        await plugin.close()
+
+
+@pytest.mark.asyncio
+async def test_zodiac_concurrent_driver_scans(tmp_path):
+    """Test that concurrent scans do not wait for each other's driver."""
+    zodiac_dir = tmp_path / "zodiac"
+    zodiac_dir.mkdir()
+    (zodiac_dir / "main.py").write_text(
+        "import sys, time\n"
+        "time.sleep(0.5)\n"
+        "open(sys.argv[sys.argv.index('--output') + 1], 'w').write('findings: []\\n')\n"
+    )
+    target = tmp_path / "main.tf"
+    target.write_text("")
+    
+    plugin = ZodiacPlugin({"zodiac_path": str(zodiac_dir), "max_drivers": 2})
+    try:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(*(plugin.scan(target) for _ in range(3)))
+        elapsed = loop.time() - started
+        
+        assert [result["success"] for result in results] == [True] * 3
+        assert elapsed < 1.4
+        
+        # Two drivers are kept; the third scan ran in a process of its own
+        assert len(plugin._idle_drivers) == 2
+        assert plugin._use_driver is True
+    finally:
+        await plugin.close()
+    assert plugin._drivers == set()
+
+
+@pytest.mark.asyncio
+async def test_zodiac_driver_timeout_then_rescan(tmp_path):
+    """Test that a scan cancelled mid-request does not leak its reply."""
+    zodiac_dir = tmp_path / "zodiac"
+    zodiac_dir.mkdir()
+    (zodiac_dir / "main.py").write_text(
+        "import sys, time\n"
+        "target = open(sys.argv[sys.argv.index('--input') + 1]).read()\n"
+        "out = sys.argv[sys.argv.index('--output') + 1]\n"
+        "open(out, 'w').write('findings:\\n- id: ' + (target or 'Z1') + '\\n')\n"
+        "if target == 'slow':\n"
+        "    time.sleep(1)\n"
+        "    sys.exit(3)\n"
+    )
+    slow = tmp_path / "slow.tf"
+    slow.write_text("slow")
+    fast = tmp_path / "main.tf"
+    fast.write_text("")
+    plugin = ZodiacPlugin({"zodiac_path": str(zodiac_dir)})
+    
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(plugin.scan(slow), timeout=0.3)
+        
+        for _ in range(2):
+            result = await plugin.scan(fast)
+            assert result["success"] is True
+            assert result["results"] == {"findings": [{"id": "Z1"}]}
+    finally:
+        await plugin.close()
+
+
+def test_zodiac_report_streaming():
+    """Test that streamed Zodiac reports match a full YAML load."""
+    reports = [
+        "findings:\n- id: Z1\n  line: 3\n- &z2 {id: Z2, fixed: null}\n- *z2\nsummary:\n  total: 3\n",
+        "findings: []\n",
+        "- not a mapping\n",
+        "",
+    ]
+    for report in reports:
+        assert _load_zodiac_report(io.StringIO(report)) == yaml.safe_load(report)
+
+
+@pytest.mark.asyncio
+async def test_zodiac_cached_checkout(tmp_path):
+    """Test that Zodiac is shallow-cloned into its cache directory once."""
+    upstream = git.Repo.init(tmp_path / "upstream")
+    (tmp_path / "upstream" / "main.py").write_text("")
+    upstream.index.add(["main.py"])
+    upstream.index.commit("Add main.py")
+    
+    config = {
+        "zodiac_repo": (tmp_path / "upstream").as_uri(),
+        "cache_dir": str(tmp_path / "cache" / "zodiac"),
+    }
+    plugin = ZodiacPlugin(config)
+    paths = await asyncio.gather(*(plugin._ensure_zodiac_available() for _ in range(3)))
+    path = paths[0]
+    assert paths == [tmp_path / "cache" / "zodiac"] * 3
+    assert (path / "main.py").exists()
+    
+    # A second plugin refreshes the existing checkout instead of cloning,
+    # even if the URL is spelled differently
+    (path / "untracked").write_text("")
+    same_repo = {**config, "zodiac_repo": config["zodiac_repo"] + "/"}
+    assert await ZodiacPlugin(same_repo)._ensure_zodiac_available() == path
+    assert git.Repo(path).head.commit.hexsha == upstream.head.commit.hexsha
+    assert (path / "untracked").exists()
+    
+    # Pointing zodiac_repo somewhere else replaces the cached checkout
+    fork = git.Repo.init(tmp_path / "fork")
+    (tmp_path / "fork" / "main.py").write_text("# fork")
+    fork.index.add(["main.py"])
+    fork.index.commit("Add main.py")
+    config["zodiac_repo"] = (tmp_path / "fork").as_uri()
+    assert await ZodiacPlugin(config)._ensure_zodiac_available() == path
+    assert git.Repo(path).remotes.origin.url == config["zodiac_repo"]
+    assert (path / "main.py").read_text() == "# fork"
+    
+    # A cache_dir the plugin did not create is never deleted
+    user_dir = tmp_path / "user"
+    user_dir.mkdir()
+    (user_dir / "notes.txt").write_text("keep")
+    plugin = ZodiacPlugin({**config, "cache_dir": str(user_dir)})
+    with pytest.raises(PluginError):
+        await plugin._ensure_zodiac_available()
+    assert (user_dir / "notes.txt").read_text() == "keep"
+    
+    # A failed clone leaves nothing behind
+    plugin = ZodiacPlugin({
+        "zodiac_repo": (tmp_path / "missing").as_uri(),
+        "cache_dir": str(tmp_path / "new"),
+    })
+    with pytest.raises(git.GitCommandError):
+        await plugin._ensure_zodiac_available()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cache", "fork", "new.lock", "upstream", "user", "user.lock"]
+
+
+@pytest.mark.asyncio
+async def test_zodiac_shared_lookup_cancel(tmp_path):
+    """Test that cancelling one caller does not fail the shared lookup."""
+    plugin = ZodiacPlugin({"zodiac_path": str(tmp_path)})
+    release = asyncio.Event()
+    calls = []
+    
+    async def prepare():
+        calls.append(1)
+        await release.wait()
+        if len(calls) == 1:
+            raise PluginError("clone failed")
+        return tmp_path
+    
+    plugin._prepare_zodiac = prepare
+    first = asyncio.ensure_future(plugin._ensure_zodiac_available())
+    second = asyncio.ensure_future(plugin._ensure_zodiac_available())
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    
+    with pytest.raises(PluginError):
+        await second
+    assert first.cancelled()
+    
+    # The failed lookup is retried, then reused
+    assert await plugin._ensure_zodiac_available() == tmp_path
+    assert await plugin._ensure_zodiac_available() == tmp_path
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_checkov_cli_report_streaming(monkeypatch):
+    """Test that streamed and fully loaded Checkov reports match."""
+    report = [
+        {
+            "check_type": "terraform",
+            "results": {
+                "failed_checks": [{
+                    "check_id": "CKV_AWS_19",
+                    "check_name": "Ensure S3 encryption",
+                    "resource": "aws_s3_bucket.logs",
+                    "file_path": "/main.tf",
+                    "file_line_range": [1, 5],
+                    "guideline": None,
+                    "severity": "HIGH",
+                    "code_block": [[1, "resource"]],
+                }],
+                "passed_checks": [{
+                    "check_id": "CKV_AWS_21",
+                    "check_name": "Ensure S3 versioning",
+                    "resource": "aws_s3_bucket.logs",
+                    "file_path": "/main.tf",
+                }],
+                "skipped_checks": [],
+            },
+            "summary": {"passed": 1, "failed": 1},
+        },
+        {"check_type": "secrets", "results": {"failed_checks": []}},
+    ]
+    
+    formatted = checkov_plugin._format_cli_report(report)
+    assert formatted["failed_checks"] == [{
+        "id": "CKV_AWS_19",
+        "name": "Ensure S3 encryption",
+        "resource": "aws_s3_bucket.logs",
+        "file_path": "/main.tf",
+        "file_line_range": [1, 5],
+        "guideline": None,
+        "severity": "HIGH",
+        "framework": "terraform",
+    }]
+    assert formatted["summary"] == {"failed": 1, "passed": 1, "skipped": 0, "total": 2}
+    
+    monkeypatch.setattr(checkov_plugin, "STREAM_THRESHOLD", 16)
+    for data in (report, report[0]):
+        stream = asyncio.StreamReader()
+        stream.feed_data(json.dumps(data).encode())
+        stream.feed_eof()
+        assert await checkov_plugin._read_cli_report(stream) == checkov_plugin._format_cli_report(data)
+
+
+class FakeRunner:
+    """Stand-in for the Checkov Runner used by the API scan path."""
+    
+    instances = 0
+    
+    def __init__(self):
+        FakeRunner.instances += 1
+    
+    def run(self, **kwargs):
+        check = SimpleNamespace(
+            check_id="CKV_AWS_19",
+            check_name="Ensure S3 encryption",
+            resource="aws_s3_bucket.logs",
+            file_path="/main.tf",
+            file_line_range=[1, 5],
+            guideline=None,
+            severity="HIGH",
+        )
+        frameworks = ["terraform"] if kwargs["framework"] == ["all"] else kwargs["framework"]
+        return {"results": {
+            framework: {"failed_checks": [check], "passed_checks": [check]}
+            for framework in frameworks
+        }}
+
+
+@pytest.mark.asyncio
+async def test_checkov_api_scan(monkeypatch, tmp_path):
+    """Test the Checkov API scan path and that its Runner is reused."""
+    monkeypatch.setattr(checkov_plugin, "Runner", FakeRunner)
+    monkeypatch.setattr(FakeRunner, "instances", 0)
+    plugin = checkov_plugin.CheckovPlugin()
+    
+    for _ in range(2):
+        result = await plugin.scan(tmp_path)
+        assert result["success"] is True
+        assert result["summary"] == {"failed": 1, "passed": 1, "skipped": 0, "total": 2}
+        assert result["failed_checks"][0]["id"] == "CKV_AWS_19"
+        assert result["failed_checks"][0]["framework"] == "terraform"
+    
+    assert FakeRunner.instances == 1
+    
+    # Several frameworks share one Runner and one run
+    plugin = checkov_plugin.CheckovPlugin({"frameworks": ["terraform", "kubernetes"]})
+    result = await plugin.scan(tmp_path)
+    assert result["summary"]["failed"] == 2
+    assert {check["framework"] for check in result["failed_checks"]} == {"terraform", "kubernetes"}
+    assert FakeRunner.instances == 2
+    
+    plugin = checkov_plugin.CheckovPlugin({"summary_only": True})
+    result = await plugin.scan(tmp_path)
+    assert result["summary"] == {"failed": 1, "passed": 1, "skipped": 0, "total": 2}
+    assert result["failed_checks"] == []
+
+
+def test_scan_request_defaults():
+    """Test that a scan request only requires a path."""
+    request = ScanRequest(path=".")
+    
+    assert request.tools == []
+    assert request.config == {}
+    assert request.files is None
+
+
+@pytest.mark.asyncio
+async def test_server_run_plugin(server, tmp_path):
+    """Test that server plugin scans are bounded and time out."""
+    semaphore = asyncio.Semaphore(2)
+    outcomes = await asyncio.gather(*(
+        server._run_plugin("recording", tmp_path, None, {"recording": {"delay": 0.05}}, semaphore)
+        for _ in range(5)
+    ))
+    
+    assert [error for _, _, error in outcomes] == [None] * 5
+    assert RecordingPlugin.max_active == 2
+    
+    tool_name, result, error = await server._run_plugin(
+        "recording", tmp_path, None, {"recording": {"delay": 5}}, semaphore
+    )
+    assert (tool_name, result) == ("recording", None)
+    assert error == "Scan timed out after 0.5 seconds"
+    assert RecordingPlugin.active == 0
+    
+    assert await server._run_plugin("missing", tmp_path, None, {}, semaphore) == (
+        "missing", None, "Plugin not found: missing"
+    )
+
+
+def test_server_scan_route(server, tmp_path):
+    """Test that /scan reports each tool's result or error."""
+    client = TestClient(server.app)
+    
+    response = client.post("/scan", json={"path": str(tmp_path), "tools": ["recording", "missing"]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is False
+    assert body["results"] == {"recording": {"success": True, "results": {"config": {}}}}
+    assert body["errors"] == {"missing": "Plugin not found: missing"}
+    
+    response = client.post("/scan", json={"path": str(tmp_path / "missing")})
+    assert response.status_code == 404
+
+
+def test_server_shared_plugin_instances(server, tmp_path):
+    """Test that the server reuses one validated instance per tool."""
+    client = TestClient(server.app)
+    shared = server._plugins["recording"]
+    
+    for _ in range(2):
+        response = client.post("/scan", json={"path": str(tmp_path), "tools": ["recording"]})
+        assert response.json()["results"]["recording"]["results"]["config"] == {}
+    assert RecordingPlugin.instances == [shared]
+    assert RecordingPlugin.validations == 1
+    
+    # A per-tool config override gets an instance of its own
+    response = client.post("/scan", json={
+        "path": str(tmp_path),
+        "tools": ["recording"],
+        "config": {"recording": {"delay": 0}},
+    })
+    assert response.json()["results"]["recording"]["results"]["config"] == {"delay": 0}
+    assert len(RecordingPlugin.instances) == 2
+    assert RecordingPlugin.instances[1] is not shared
+    assert server._plugins["recording"] is shared
+    
+    # ...which is closed after the request, while the shared one is only
+    # closed when the server shuts down
+    assert RecordingPlugin.closed == [RecordingPlugin.instances[1]]
+    with TestClient(server.app):
+        pass
+    assert RecordingPlugin.closed[-1] is shared
+
+
+def test_server_scan_stream_route(server, tmp_path):
+    """Test that /scan/stream emits one NDJSON event per tool, then a summary."""
+    client = TestClient(server.app)
+    
+    response = client.post(
+        "/scan/stream", json={"path": str(tmp_path), "tools": ["recording", "missing"]}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    
+    assert sorted(events[:2], key=lambda event: event["tool"]) == [
+        {"type": "tool_error", "tool": "missing", "error": "Plugin not found: missing"},
+        {"type": "tool_result", "tool": "recording", "result": {"success": True, "results": {"config": {}}}},
+    ]
+    assert events[2:] == [
+        {"type": "done", "success": False, "errors": {"missing": "Plugin not found: missing"}},
+    ]
+
+
+def test_cli_plugins_capabilities_cache(mock_plugin, monkeypatch, tmp_path):
+    """Test that the plugins command caches capabilities on disk."""
+    cache_file = tmp_path / "iac_scanner" / "capabilities.json"
+    monkeypatch.setattr(cli, "CAPABILITIES_CACHE", cache_file)
+    probed = []
+    
+    async def probe(plugin_class):
+        probed.append(plugin_class)
+        return await plugin_class().get_capabilities()
+    
+    monkeypatch.setattr(cli, "get_plugin_capabilities", probe)
+    runner = CliRunner()
+    
+    result = runner.invoke(cli.main, ["plugins"])
+    assert result.exit_code == 0, result.output
+    assert "Mock plugin for testing" in result.output
+    assert MockPlugin in probed
+    assert json.loads(cache_file.read_text())["mock"]["capabilities"]["name"] == "mock"
+    
+    # Later runs are served from the cache
+    probed.clear()
+    result = runner.invoke(cli.main, ["plugins"])
+    assert result.exit_code == 0, result.output
+    assert "Mock plugin for testing" in result.output
+    assert probed == []
+    
+    # A new package version invalidates the cached entries
+    monkeypatch.setattr(cli, "__version__", "0.0.0-test")
+    result = runner.invoke(cli.main, ["plugins"])
+    assert result.exit_code == 0, result.output
+    assert MockPlugin in probed
+
+
+def test_cli_scan_closes_plugins(recording_plugin, tmp_path):
+    """Test that the scan command closes the plugins it creates."""
+    result = CliRunner().invoke(cli.main, ["scan", "--path", str(tmp_path), "--tools", "recording"])
+    assert result.exit_code == 0, result.output
+    
+    assert len(RecordingPlugin.instances) == 1
+    assert RecordingPlugin.closed == RecordingPlugin.instances
@@ -0,0 +1,221 @@
+"""Tests for the LLM client."""
+
+import io
+import json
+import os
+import sys
+import threading
+import zlib
+import pytest
+
+# Add the parent directory to the path so we can import the package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from iac_scanner.core.llm import (
+    DEFAULT_MODEL_ID,
+    KB_VERSION,
+    LLMClient,
+    _compact_results,
+    _extract_json,
+)
+from iac_scanner.core.semantic_cache import LocalIndex, normalize_findings
+
+
+class MockBedrockClient:
+    """Mock Bedrock runtime client for testing."""
+    
+    def __init__(self, completion):
+        self.completion = completion
+        self.calls = 0
+    
+    def invoke_model(self, modelId, body):
+        """Mock invoke_model method."""
+        if modelId.startswith("amazon.titan-embed"):
+            # Bag of words over the whole normalized text, so only results
+            # with the same findings embed alike
+            embedding = [0.0] * 256
+            for word in json.loads(body)["inputText"].split():
+                embedding[zlib.crc32(word.encode()) % 256] += 1.0
+            return {"body": io.BytesIO(json.dumps({"embedding": embedding}).encode())}
+        
+        self.calls += 1
+        payload = json.dumps({
+            "content": [{"type": "text", "text": self.completion}],
+            "usage": {"cache_read_input_tokens": 0, "cache_creation_input_tokens": 0},
+        }).encode()
+        return {"body": io.BytesIO(payload)}
+    
+    
+    def invoke_model_with_response_stream(self, modelId, body):
+        """Mock invoke_model_with_response_stream method."""
+        self.calls += 1
+        events = [{"chunk": {"bytes": json.dumps({"type": "message_start"}).encode()}}]
+        for i in range(0, len(self.completion), 4):
+            delta = {"type": "content_block_delta", "delta": {"text": self.completion[i:i + 4]}}
+            events.append({"chunk": {"bytes": json.dumps(delta).encode()}})
+        return {"body": iter(events)}
+
+
+def make_client(completion, **config):
+    """Create an LLM client backed by a mock Bedrock client."""
+    client = LLMClient({"model_id": DEFAULT_MODEL_ID, **config})
+    client._bedrock_client = MockBedrockClient(completion)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_process_scan_results_cached():
+    """Test that identical scan results only invoke the model once."""
+    client = make_client(json.dumps({"summary": "ok"}))
+    results = {"checkov": {"failed_checks": []}}
+    
+    first = await client.process_scan_results(results)
+    second = await client.process_scan_results(dict(results))
+    
+    assert first["summary"] == "ok"
+    assert second == first
+    assert client._bedrock_client.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_anthropic_request_uses_cached_system_prompt():
+    """Test that Claude requests send the static instructions as a cached block."""
+    client = make_client(json.dumps({"summary": "ok"}))
+    bodies = []
+    invoke_model = client._bedrock_client.invoke_model
+    
+    def capture(modelId, body):
+        bodies.append(json.loads(body))
+        return invoke_model(modelId=modelId, body=body)
+    
+    client._bedrock_client.invoke_model = capture
+    await client.process_scan_results({"checkov": {}})
+    
+    system = bodies[0]["system"]
+    assert system[0]["cache_control"] == {"type": "ephemeral"}
+    assert KB_VERSION in system[1]["text"]
+    assert system[1]["cache_control"] == {"type": "ephemeral"}
+    assert bodies[0]["messages"][0]["role"] == "user"
+
+
+@pytest.mark.asyncio
+async def test_process_scan_results_semantic_cache():
+    """Test that reordered findings with extra fields reuse a prior analysis."""
+    client = make_client(json.dumps({"summary": "ok"}), semantic_cache_threshold=0.92)
+    finding_a = {"id": "CKV_AWS_20", "resource": "aws_s3_bucket.a", "severity": "HIGH"}
+    finding_b = {"id": "CKV_AWS_19", "resource": "aws_s3_bucket.b", "severity": "LOW"}
+    
+    first = await client.process_scan_results(
+        {"checkov": {"failed_checks": [finding_a, finding_b], "timestamp": 1}}
+    )
+    second_results = {"checkov": {"failed_checks": [finding_b, finding_a], "timestamp": 2}}
+    second = await client.process_scan_results(second_results)
+    
+    assert second["summary"] == first["summary"]
+    assert second["raw_results"] is second_results
+    assert client._bedrock_client.calls == 1
+    
+    # Different findings are analysed anew
+    finding_c = {"id": "CKV_AWS_21", "resource": "aws_s3_bucket.c", "severity": "MEDIUM"}
+    await client.process_scan_results({"checkov": {"failed_checks": [finding_a, finding_c]}})
+    assert client._bedrock_client.calls == 2
+    await client.process_scan_results({"checkov": {"failed_checks": [finding_c]}})
+    assert client._bedrock_client.calls == 3
+    
+    # Analyses made with other model settings are not reused
+    client.config["temperature"] = 0.5
+    await client.process_scan_results({"checkov": {"failed_checks": [finding_a, finding_b]}})
+    assert client._bedrock_client.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_saves_off_the_event_loop(tmp_path):
+    """Test that the semantic cache is persisted from a worker thread."""
+    path = tmp_path / "semantic.npz"
+    client = make_client(
+        json.dumps({"summary": "ok"}), semantic_cache_threshold=0.92, semantic_cache_path=str(path)
+    )
+    index = client._semantic_index
+    threads = []
+    write = index._write
+    
+    def record_write(*args):
+        threads.append(threading.current_thread())
+        write(*args)
+    
+    index._write = record_write
+    finding = {"id": "CKV_AWS_20", "resource": "aws_s3_bucket.a", "severity": "HIGH"}
+    await client.process_scan_results({"checkov": {"failed_checks": [finding]}})
+    await index.flush()
+    
+    assert threads and threading.main_thread() not in threads
+    assert LocalIndex(path).responses == [{"summary": "ok"}]
+
+
+def test_normalize_findings_ignores_passed_checks():
+    """Test that a fixed finding does not normalize like an open one."""
+    check = {"check_id": "CKV_AWS_20", "resource": "aws_s3_bucket.a", "severity": None}
+    before_fix = {"checkov": {"failed_checks": [check], "passed_checks": []}}
+    after_fix = {"checkov": {"failed_checks": [], "passed_checks": [check]}}
+    
+    assert normalize_findings(before_fix) == "checkov failed_checks CKV_AWS_20 aws_s3_bucket.a "
+    assert normalize_findings(after_fix) == ""
+
+
+@pytest.mark.asyncio
+async def test_stream_scan_results():
+    """Test that streamed deltas reassemble into the full completion."""
+    completion = json.dumps({"summary": "streamed"})
+    client = make_client(completion)
+    
+    chunks = [text async for text in client.stream_scan_results({"checkov": {}})]
+    
+    assert len(chunks) > 1
+    assert "".join(chunks) == completion
+
+
+def test_compact_results():
+    """Test that prompt payloads keep only essential, unique findings."""
+    finding = {
+        "check_id": "CKV_AWS_20",
+        "check_name": "S3 Bucket has an ACL defined which allows public READ access.",
+        "resource": "aws_s3_bucket.data",
+        "file_path": "/main.tf",
+        "file_line_range": [1, 10],
+        "guideline": "https://docs.example.com/CKV_AWS_20",
+        "severity": None,
+    }
+    results = {
+        "checkov": {
+            "success": True,
+            "failed_checks": [finding, dict(finding)],
+            "passed_checks": [finding],
+            "skipped_checks": [],
+            "summary": {"failed": 2, "passed": 1, "skipped": 0},
+        },
+        "zodiac": {"success": True, "results": {}, "stderr": ""},
+    }
+    
+    compacted = _compact_results(results)
+    
+    assert compacted["checkov"]["failed_checks"] == [{
+        "id": "CKV_AWS_20",
+        "name": "S3 Bucket has an ACL defined which allows public READ access.",
+        "resource": "aws_s3_bucket.data",
+        "file": "/main.tf",
+        "line": [1, 10],
+    }]
+    assert "passed_checks" not in compacted["checkov"]
+    assert "skipped_checks" not in compacted["checkov"]
+    assert compacted["checkov"]["summary"]["skipped"] == 0
+    assert compacted["zodiac"] == {"success": True}
+
+
+def test_extract_json():
+    """Test extracting the JSON object from narrative model output."""
+    text = 'Analysis:\n```json\n{"summary": {"count": 1}}\n```\nSee also {"other": 2}'
+    
+    assert _extract_json(text) == {"summary": {"count": 1}}
+    assert _extract_json('{"summary": "ok"}') == {"summary": "ok"}
+    with pytest.raises(ValueError):
+        _extract_json("No issues found {")